@@ -0,0 +1,485 @@
+# Vectorised showdowns: evaluates many boards per NumPy call instead of one
+# Game object per deal. Strengths are bit-for-bit the same ints as
+# eval_funcs.hand_strength, so results can be mixed freely with the scalar path.
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import chain, combinations
+from math import comb
+
+import numpy as np
+
+from src import jit
+from src.cards import RANKS, SUIT_INDEX, encode_cards
+from src.eval_funcs import CLASS_SHIFT, FLUSH_TABLE, STRAIGHT_HIGH, TOP
+from src.eval_funcs import OMAHA_BOARD_TRIPLES, OMAHA_HOLE_PAIRS
+from src.eval_funcs import (
+    FOUR_OF_A_KIND,
+    FULL_HOUSE,
+    HIGH_CARD,
+    PAIR,
+    STRAIGHT,
+    THREE_OF_A_KIND,
+    TWO_PAIR,
+)
+
+_STRAIGHT_HIGH = np.array(STRAIGHT_HIGH, dtype=np.int64)
+_TOP = [np.array(table, dtype=np.int64) for table in TOP]
+_FLUSH_TABLE = np.array(FLUSH_TABLE, dtype=np.int64)
+_POW2 = 1 << np.arange(13, dtype=np.int64)
+_RANK_BIT = np.array([0, 0] + [1 << r for r in range(13)], dtype=np.int64)  # by rank
+
+# Omaha: exactly 2 of the 4 hole cards and 3 of the 5 board cards
+HOLE_PAIRS = np.array(OMAHA_HOLE_PAIRS)
+BOARD_TRIPLES = np.array(OMAHA_BOARD_TRIPLES)
+
+
+def _counts(values, size):
+    """Row-wise histogram of small ints: (N, k) -> (N, size)."""
+    n = values.shape[0]
+    offsets = np.arange(n, dtype=np.int64)[:, None] * size
+    return np.bincount((values + offsets).ravel(), minlength=n * size).reshape(n, size)
+
+
+def evaluate_batch(cards):
+    """Strengths for an (N, k) int array of cards, 5 <= k <= 7."""
+    cards = np.asarray(cards, dtype=np.int64)
+    ranks = cards >> 2
+    suits = cards & 3
+    strengths = _rank_strengths(_counts(ranks, 13))
+
+    # a flush can't coexist with quads or a full house in 7 cards, so it
+    # simply overrides the non-flush strength
+    suit_counts = _counts(suits, 4)
+    flush_suit = suit_counts.argmax(axis=1)
+    is_flush = suit_counts.max(axis=1) >= 5
+    flush_mask = np.where(suits == flush_suit[:, None], 1 << ranks, 0).sum(axis=1)
+    return np.where(is_flush, _FLUSH_TABLE[flush_mask], strengths)
+
+
+def _rank_strengths(rank_counts):
+    """Non-flush strengths from an (N, 13) array of per-rank card counts."""
+    m1 = (rank_counts >= 1) @ _POW2
+    m2 = (rank_counts >= 2) @ _POW2
+    m3 = (rank_counts >= 3) @ _POW2
+    m4 = (rank_counts >= 4) @ _POW2
+
+    top1, top2, top3, top5 = _TOP[1], _TOP[2], _TOP[3], _TOP[5]
+    quads = top1[m4]
+    trips = top1[m3]
+    pair_rest = m2 & ~_RANK_BIT[trips]
+    high_pair = top1[m2]
+    second_pair = top1[m2 & ~_RANK_BIT[high_pair]]
+    straight_high = _STRAIGHT_HIGH[m1]
+
+    candidates = [
+        (
+            m4 != 0,
+            (FOUR_OF_A_KIND << CLASS_SHIFT) | (quads << 16) | (top1[m1 & ~m4] << 12),
+        ),
+        (
+            (m3 != 0) & (pair_rest != 0),
+            (FULL_HOUSE << CLASS_SHIFT) | (trips << 16) | (top1[pair_rest] << 12),
+        ),
+        (straight_high != 0, (STRAIGHT << CLASS_SHIFT) | (straight_high << 16)),
+        (
+            m3 != 0,
+            (THREE_OF_A_KIND << CLASS_SHIFT) | (trips << 16) | (top2[m1 & ~m3] << 8),
+        ),
+        (
+            second_pair != 0,
+            (TWO_PAIR << CLASS_SHIFT)
+            | (high_pair << 16)
+            | (second_pair << 12)
+            | (top1[m1 & ~(_RANK_BIT[high_pair] | _RANK_BIT[second_pair])] << 8),
+        ),
+        (m2 != 0, (PAIR << CLASS_SHIFT) | (high_pair << 16) | (top3[m1 & ~m2] << 4)),
+    ]
+    return np.select(
+        [condition for condition, _ in candidates],
+        [value for _, value in candidates],
+        default=(HIGH_CARD << CLASS_SHIFT) | top5[m1],
+    )
+
+
+def _texas_strengths(hole, board):
+    """player_strengths for Hold'em: the board's rank and suit counts are
+    built once per deal and each player's two hole cards added on top,
+    rather than histogramming the whole 7 cards for every player."""
+    n, players, _ = hole.shape
+    board_ranks = board >> 2
+    board_suits = board & 3
+    rank_counts = _counts(board_ranks, 13)[:, None, :] + _counts(
+        (hole >> 2).reshape(n * players, 2), 13
+    ).reshape(n, players, 13)
+    strengths = _rank_strengths(rank_counts.reshape(n * players, 13))
+    strengths = strengths.reshape(n, players)
+
+    # only a suit with 3+ board cards can make a flush, and at most one has
+    suit_counts = _counts(board_suits, 4)
+    flush_suit = suit_counts.argmax(axis=1)
+    drawing = suit_counts.max(axis=1) >= 3
+    if not drawing.any():
+        return strengths
+    board_mask = np.where(board_suits == flush_suit[:, None], 1 << board_ranks, 0)
+    suited = (hole & 3) == flush_suit[:, None, None]
+    suited_count = suit_counts.max(axis=1)[:, None] + suited.sum(axis=2)
+    flush_mask = board_mask.sum(axis=1)[:, None] | np.where(
+        suited, 1 << (hole >> 2), 0
+    ).sum(axis=2)
+    is_flush = drawing[:, None] & (suited_count >= 5)
+    return np.where(is_flush, _FLUSH_TABLE[flush_mask], strengths)
+
+
+def player_strengths(hole, board):
+    """Best strength per player: hole (N, players, 2 or 4), board (N, 5).
+
+    A board of 3 or 4 cards gives each player's made hand on the flop or
+    turn instead.
+    """
+    hole = np.asarray(hole, dtype=np.int64)
+    board = np.asarray(board, dtype=np.int64)
+    n, players, hand_size = hole.shape
+    board_size = board.shape[1]
+
+    if hand_size == 2:
+        return _texas_strengths(hole, board)
+
+    triple_index = (
+        BOARD_TRIPLES
+        if board_size == 5
+        else np.array(list(combinations(range(board_size), 3)))
+    )
+    t = len(triple_index)
+    pairs = hole[:, :, HOLE_PAIRS]  # (N, players, 6, 2)
+    triples = board[:, triple_index]  # (N, t, 3)
+    combos = np.concatenate(
+        [
+            np.broadcast_to(pairs[:, :, :, None, :], (n, players, 6, t, 2)),
+            np.broadcast_to(triples[:, None, None, :, :], (n, players, 6, t, 3)),
+        ],
+        axis=4,
+    )
+    strengths = evaluate_batch(combos.reshape(-1, 5))
+    return strengths.reshape(n, players, 6 * t).max(axis=2)
+
+
+def showdown(hole, board):
+    """Resolve N showdowns at once.
+
+    Returns a dict with the per-player "strengths" (N, players), a "tied"
+    mask of players sharing the best hand, "winner" (player index, or -1
+    when the pot is split) and "class_counts", a (players, 10) histogram
+    of final hand classes indexed by eval_funcs class number.
+    """
+    return _resolve(player_strengths(hole, board))
+
+
+def _resolve(strengths):
+    best = strengths.max(axis=1)
+    tied = strengths == best[:, None]
+    winner = np.where(tied.sum(axis=1) == 1, tied.argmax(axis=1), -1)
+    classes = strengths >> CLASS_SHIFT
+    class_counts = np.stack(
+        [np.bincount(classes[:, i], minlength=10) for i in range(classes.shape[1])]
+    )
+    return {
+        "strengths": strengths,
+        "tied": tied,
+        "winner": winner,
+        "class_counts": class_counts,
+    }
+
+
+def _slot_cards(cards, size, owner):
+    """encode_cards for one group of slots, -1s when the cards are unknown.
+    A wrong-sized group would shift every later slot, so it is an error."""
+    if cards is None:
+        return [-1] * size
+    if len(cards) != size:
+        raise ValueError(f"{owner} needs {size} cards, got {len(cards)}.")
+    for rank, suit in cards:
+        if rank not in RANKS or suit not in SUIT_INDEX:
+            raise ValueError(f"Invalid card {(rank, suit)!r} in {owner}.")
+    return encode_cards(cards)
+
+
+def known_slots(state_dict):
+    """Flatten a state_dict into one row of card slots (-1 = unknown):
+    every player's hole cards followed by the 5 board cards."""
+    hand_size = 4 if state_dict["game_type"] == "omaha" else 2
+    slots = []
+    for player in state_dict["players"]:
+        if player.get("range") is not None:
+            # dealing it a random hand would silently drop the range
+            raise ValueError(
+                f"{player['name']} holds a range; use src.ranges.range_equity."
+            )
+        slots.extend(_slot_cards(player["hand"], hand_size, player["name"]))
+
+    table = state_dict["table"]
+    for street, size in (("flop", 3), ("turn", 1), ("river", 1)):
+        slots.extend(_slot_cards(table.get(street), size, f"the {street}"))
+
+    known_cards = [card for card in slots if card >= 0]
+    if len(set(known_cards)) != len(known_cards):
+        raise ValueError("The same card is used more than once in the state_dict.")
+    return np.array(slots, dtype=np.int64), hand_size
+
+
+def _deal_plan(state_dict):
+    """Known slots, hand size, positions of the unknown slots and the
+    cards left to fill them."""
+    slots, hand_size = known_slots(state_dict)
+    unknown = np.flatnonzero(slots < 0)
+    remaining = np.setdiff1d(np.arange(52), slots[slots >= 0])
+    return slots, hand_size, unknown, remaining
+
+
+def deal_batch(state_dict, n, rng):
+    """Deal n random completions of a state_dict.
+
+    Returns hole (n, players, hand_size) and board (n, 5) int arrays.
+    """
+    slots, hand_size, unknown, remaining = _deal_plan(state_dict)
+    deals = np.broadcast_to(slots, (n, slots.size)).copy()
+    if unknown.size:
+        # partial Fisher-Yates on every row at once: only the first
+        # unknown.size positions of each row's deck get shuffled (int8 keeps
+        # the per-row copy of the deck small)
+        pool = np.tile(remaining.astype(np.int8), (n, 1))
+        rows = np.arange(n)
+        for k in range(unknown.size):
+            j = k + (rng.random(n) * (remaining.size - k)).astype(np.intp)
+            picked = pool[rows, j]
+            pool[rows, j] = pool[:, k]
+            pool[:, k] = picked
+        deals[:, unknown] = pool[:, : unknown.size]
+
+    players = len(state_dict["players"])
+    hole = deals[:, : players * hand_size].reshape(n, players, hand_size)
+    board = deals[:, players * hand_size :]
+    return hole, board
+
+
+def _unknown_groups(slots, players, hand_size):
+    """Positions of unknown cards, grouped into sets whose order doesn't
+    matter: one group per random hand, one for the unknown board cards."""
+    groups = []
+    for i in range(players):
+        seat = np.arange(i * hand_size, (i + 1) * hand_size)
+        if (slots[seat] < 0).all():
+            groups.append(seat)
+    board = np.flatnonzero(slots[players * hand_size :] < 0) + players * hand_size
+    if board.size:
+        groups.append(board)
+    return groups
+
+
+def count_deals(state_dict):
+    """Number of distinct completions of a state_dict (all equally likely)."""
+    slots, hand_size = known_slots(state_dict)
+    groups = _unknown_groups(slots, len(state_dict["players"]), hand_size)
+    remaining = 52 - int((slots >= 0).sum())
+    count = 1
+    for group in groups:
+        count *= comb(remaining, group.size)
+        remaining -= group.size
+    return count
+
+
+@lru_cache(maxsize=8)
+def combination_index(n, k):
+    """All k-subsets of range(n) as an (C(n, k), k) int8 array."""
+    if k == 0:
+        return np.zeros((1, 0), dtype=np.int8)  # the one empty subset
+    flat = np.fromiter(chain.from_iterable(combinations(range(n), k)), dtype=np.int8)
+    return flat.reshape(-1, k)
+
+
+def enumerate_deals(state_dict, chunk_size=50_000):
+    """Every completion of a state_dict exactly once, as (hole, board)
+    chunks of at most chunk_size deals in the same layout as deal_batch.
+
+    Only one chunk is built at a time, so memory stays bounded however
+    many completions there are.
+    """
+    slots, hand_size = known_slots(state_dict)
+    players = len(state_dict["players"])
+    groups = _unknown_groups(slots, players, hand_size)
+    known = set(slots.tolist())
+    remaining = [card for card in range(52) if card not in known]
+    base = slots.astype(np.int8)  # int8 rows keep big enumerations small
+
+    def heads(groups, remaining):
+        # every fill of all but the last group, with the cards it leaves
+        if len(groups) == 1:
+            yield (), remaining
+            return
+        for combo in combinations(remaining, groups[0].size):
+            rest = [card for card in remaining if card not in combo]
+            for head, left in heads(groups[1:], rest):
+                yield combo + head, left
+
+    def blocks():
+        if not groups:
+            yield base[None, :]
+            return
+        head_positions = np.concatenate([np.empty(0, np.intp), *groups[:-1]])
+        for head, left in heads(groups, remaining):
+            # the last group (usually the board) is filled in one go
+            fills = np.array(left, dtype=np.int8)[
+                combination_index(len(left), groups[-1].size)
+            ]
+            block = np.broadcast_to(base, (len(fills), base.size)).copy()
+            block[:, head_positions] = head
+            block[:, groups[-1]] = fills
+            yield block
+
+    def split(deals):
+        hole = deals[:, : players * hand_size].reshape(len(deals), players, hand_size)
+        return hole, deals[:, players * hand_size :]
+
+    buffer, size = [], 0
+    for block in blocks():
+        while len(block):
+            taken = block[: chunk_size - size]
+            block = block[len(taken) :]
+            buffer.append(taken)
+            size += len(taken)
+            if size == chunk_size:
+                yield split(np.concatenate(buffer))
+                buffer, size = [], 0
+    if buffer:
+        yield split(np.concatenate(buffer))
+
+
+STREETS = (("flop", 3), ("turn", 4), ("river", 5))
+
+
+def street_showdowns(hole, board):
+    """showdown() as it stands after the flop, the turn and the river of
+    the same deals: {street: showdown dict}. The river entry is the real
+    showdown; earlier ones compare the hands made so far."""
+    return {
+        street: _resolve(player_strengths(hole, board[:, :size]))
+        for street, size in STREETS
+    }
+
+
+def new_breakdown(players):
+    """Zeroed counters for the `breakdown` argument of simulate_batch.
+
+    "class_counts" (players, 10) counts final hand classes by eval_funcs
+    class number. "turn_outs" and "river_outs" (players, 52) count, per
+    card int, the deals where that card put the player alone in the lead
+    when they weren't before it.
+    """
+    return {
+        "class_counts": np.zeros((players, 10), dtype=np.int64),
+        "turn_outs": np.zeros((players, 52), dtype=np.int64),
+        "river_outs": np.zeros((players, 52), dtype=np.int64),
+    }
+
+
+def _count_outs(counter, before, after, cards):
+    flipped = (after >= 0) & (after != before)
+    counter += np.bincount(
+        after[flipped] * 52 + cards[flipped], minlength=counter.size
+    ).reshape(counter.shape)
+
+
+def tally(hole, board, breakdown=None, known_streets=()):
+    """Winners of a batch of deals (see showdown), adding to the counters
+    of a new_breakdown() dict when one is given. Outs aren't counted on
+    streets in `known_streets`, where the card is fixed."""
+    if breakdown is None:
+        return showdown(hole, board)["winner"]
+
+    results = street_showdowns(hole, board)
+    winner = results["river"]["winner"]
+    breakdown["class_counts"] += results["river"]["class_counts"]
+    board = np.asarray(board)
+    if "turn" not in known_streets:
+        _count_outs(
+            breakdown["turn_outs"],
+            results["flop"]["winner"],
+            results["turn"]["winner"],
+            board[:, 3],
+        )
+    if "river" not in known_streets:
+        _count_outs(
+            breakdown["river_outs"], results["turn"]["winner"], winner, board[:, 4]
+        )
+    return winner
+
+
+def _untimed(stage):
+    return nullcontext()
+
+
+def known_streets(state_dict):
+    return tuple(street for street, _ in STREETS if state_dict["table"].get(street))
+
+
+def jit_winners(state_dict, n, rng):
+    """Winners (as tally returns them) of n deals, dealt and evaluated by
+    the compiled kernel of src.jit: the same deals deal_batch would make
+    with this rng, so the same winners."""
+    slots, hand_size, unknown, remaining = _deal_plan(state_dict)
+    # deal_batch draws one rng.random(n) per unknown slot, in this order
+    uniforms = rng.random((unknown.size, n))
+    players = len(state_dict["players"])
+    return jit.winners(slots, unknown, remaining, uniforms, players, hand_size)
+
+
+def simulate_batch(
+    state_dict,
+    sims,
+    rng=None,
+    batch_size=50_000,
+    breakdown=None,
+    stats=None,
+    known=None,
+):
+    """Play `sims` random deals of a state_dict in vectorised chunks.
+
+    Returns outcome counts keyed like Game.compute_winner results:
+    each player's name plus "Tie". Pass a new_breakdown() dict to also
+    collect hand-class and outs counters from the same deals, and a
+    profiling.StageStats to time the "deal" and "showdown" stages.
+
+    With numba installed (see src.jit), runs without a breakdown go
+    through the compiled kernel instead, timed as one "jit" stage; counts
+    are the same either way.
+
+    `known` overrides which streets count as known (no outs) in the
+    breakdown, for callers that fix a street the spot leaves random.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    timer = stats.timer if stats is not None else _untimed
+    names = [player["name"] for player in state_dict["players"]]
+    wins = np.zeros(len(names), dtype=np.int64)
+    ties = 0
+    if known is None:
+        known = known_streets(state_dict)
+    compiled = jit.ENABLED and breakdown is None
+
+    done = 0
+    while done < sims:
+        n = min(batch_size, sims - done)
+        if compiled:
+            with timer("jit"):
+                winner = jit_winners(state_dict, n, rng)
+        else:
+            with timer("deal"):
+                hole, board = deal_batch(state_dict, n, rng)
+            with timer("showdown"):
+                winner = tally(hole, board, breakdown, known)
+        wins += np.bincount(winner[winner >= 0], minlength=len(names))
+        ties += int((winner < 0).sum())
+        done += n
+
+    outcomes = {name: int(count) for name, count in zip(names, wins)}
+    outcomes["Tie"] = ties
+    return outcomes
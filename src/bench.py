@@ -0,0 +1,226 @@
+# Throughput benchmarks for the evaluator, dealing and whole simulations:
+#     poker-mc bench --save bench.json       record a baseline
+#     poker-mc bench --compare bench.json    report changes, exit 1 on regressions
+# Numbers are operations per second (best of a few repeats) and are only
+# comparable between runs on the same machine.
+import fnmatch
+import json
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.batch_eval import evaluate_batch, simulate_batch
+from src.classes import CARDS, Card, Deck, Game, IntDeck, Player
+from src.cards import RANKS, SUITS
+from src.eval_funcs import evaluate_hand, hand_strength
+
+REPEAT = 3
+
+# name -> (unit, factory); factory(scale) returns (run, ops) where one
+# call of run() performs `ops` operations
+BENCHMARKS = {}
+
+
+def benchmark(name, unit):
+    def register(factory):
+        BENCHMARKS[name] = (unit, factory)
+        return factory
+
+    return register
+
+
+def _random_hands(n, size, seed=0):
+    rng = random.Random(seed)
+    return [rng.sample(range(52), size) for _ in range(n)]
+
+
+@benchmark("evaluate_hand", "evals/s")
+def _evaluate_hand(scale):
+    # the Card-object API Game used to call for every player
+    hands = []
+    for codes in _random_hands(int(20_000 * scale), 7):
+        player = Player(None, "bench")
+        player.cards = [CARDS[code] for code in codes[:2]]
+        hands.append((player, [CARDS[code] for code in codes[2:]]))
+
+    def run():
+        for player, board in hands:
+            evaluate_hand(player, board)
+
+    return run, len(hands)
+
+
+@benchmark("hand_strength", "evals/s")
+def _hand_strength(scale):
+    hands = _random_hands(int(50_000 * scale), 7)
+
+    def run():
+        for cards in hands:
+            hand_strength(cards)
+
+    return run, len(hands)
+
+
+@benchmark("evaluate_batch", "evals/s")
+def _evaluate_batch(scale):
+    hands = np.array(_random_hands(int(200_000 * scale), 7))
+    return lambda: evaluate_batch(hands), len(hands)
+
+
+def _state(players, omaha):
+    return {
+        "players": [{"name": f"P{i}", "hand": None} for i in range(players)],
+        "table": {"flop": None, "turn": None, "river": None},
+        "game_type": "omaha" if omaha else "texas",
+    }
+
+
+def _play(game):
+    game.start()
+    game.flop()
+    game.turn()
+    game.river()
+    return game
+
+
+@benchmark("omaha_compute_winner", "deals/s")
+def _omaha_compute_winner(scale):
+    state = _state(6, omaha=True)
+    games = [
+        _play(Game(6, state, verbose=False, deck=IntDeck(random.Random(i))))
+        for i in range(int(2_000 * scale))
+    ]
+
+    def run():
+        for game in games:
+            game.compute_winner()
+
+    return run, len(games)
+
+
+@benchmark("deck_deal", "deals/s")
+def _deck_deal(scale):
+    # the original list-of-Card deck: rebuilt and shuffled for every hand
+    n = int(5_000 * scale)
+
+    def run():
+        for _ in range(n):
+            deck = Deck([Card(rank, suit) for rank in RANKS for suit in SUITS])
+            deck.shuffle()
+            for _ in range(9):
+                deck.draw()
+
+    return run, n
+
+
+@benchmark("intdeck_deal", "deals/s")
+def _intdeck_deal(scale):
+    n = int(50_000 * scale)
+    deck = IntDeck(random.Random(0))
+
+    def run():
+        for _ in range(n):
+            deck.reset()
+            deck.deal(9)
+
+    return run, n
+
+
+def _game_hands(players, omaha):
+    def factory(scale):
+        n = int((2_000 if omaha else 5_000) * scale)
+        state = _state(players, omaha)
+        deck = IntDeck(random.Random(0))
+
+        def run():
+            for _ in range(n):
+                _play(Game(players, state, verbose=False, deck=deck)).compute_winner()
+
+        return run, n
+
+    return factory
+
+
+def _batch_hands(players, omaha):
+    def factory(scale):
+        n = int((20_000 if omaha else 100_000) * scale)
+        state = _state(players, omaha)
+        rng = np.random.default_rng(0)
+        return lambda: simulate_batch(state, n, rng), n
+
+    return factory
+
+
+for _variant, _omaha in (("texas", False), ("omaha", True)):
+    for _players in range(2, 7):
+        benchmark(f"game_{_variant}_{_players}p", "hands/s")(
+            _game_hands(_players, _omaha)
+        )
+        benchmark(f"batch_{_variant}_{_players}p", "hands/s")(
+            _batch_hands(_players, _omaha)
+        )
+
+
+def run_benchmarks(only=None, scale=1.0, repeat=REPEAT, progress=None):
+    """Run the benchmarks whose names match the glob `only` (all by
+    default); returns {name: {"rate": ops per second, "unit": ...}}."""
+    results = {}
+    for name, (unit, factory) in BENCHMARKS.items():
+        if only and not fnmatch.fnmatch(name, only):
+            continue
+        run, ops = factory(scale)
+        run()  # warm-up: lazy tables, caches, first NumPy calls
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - started)
+        results[name] = {"rate": ops / best, "unit": unit}
+        if progress:
+            progress(name, results[name])
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def machine_info():
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "commit": _commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save_baseline(path, results):
+    with open(path, "w") as f:
+        json.dump({"machine": machine_info(), "results": results}, f, indent=2)
+
+
+def compare(results, baseline, tolerance=0.10):
+    """Per benchmark present in both: (name, baseline rate, current rate,
+    ratio, regressed). A benchmark regressed if it got slower by more
+    than `tolerance`."""
+    rows = []
+    for name, current in results.items():
+        if name in baseline["results"]:
+            before = baseline["results"][name]["rate"]
+            ratio = current["rate"] / before
+            rows.append((name, before, current["rate"], ratio, ratio < 1 - tolerance))
+    return rows
@@ -0,0 +1,139 @@
+# Persistent equity cache shared by every Streamlit session and process.
+# Entries live in SQLite keyed by a suit-isomorphic encoding of the
+# state_dict, with least-recently-used eviction past a size cap.
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from src.canonical import canonical_key
+
+DEFAULT_PATH = Path(
+    os.environ.get(
+        "POKER_MC_CACHE", Path.home() / ".cache" / "poker_mc" / "equity.sqlite"
+    )
+)
+
+# result fields that are keyed by player name (plus "Tie")
+_PER_PLAYER = ("outcomes", "win_prob", "std_error", "ci")
+
+# rewriting last_used on every hit would turn each read into a write;
+# recency only needs to be this fresh (seconds) for eviction to work
+_TOUCH_INTERVAL = 60
+
+
+def to_seats(result, names):
+    """Per-player fields of a result as lists in seat order (names, then Tie)."""
+    stored = dict(result)
+    for field in _PER_PLAYER:
+        if field in result:
+            stored[field] = [result[field][name] for name in names + ["Tie"]]
+    return stored
+
+
+def from_seats(stored, names):
+    """Inverse of to_seats: key the stored lists by these player names."""
+    result = dict(stored)
+    for field in _PER_PLAYER:
+        if field in stored:
+            values = stored[field]
+            if field == "ci":
+                values = [tuple(value) for value in values]
+            result[field] = dict(zip(names + ["Tie"], values))
+    return result
+
+
+class EquityCache:
+    """SQLite-backed equity results, shared across processes.
+
+    A small in-process LRU sits in front of the database and answers
+    repeats of the exact same query without touching SQLite. One instance
+    may be shared by many threads (Streamlit sessions): the connection and
+    the LRU are only used under a lock.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_entries=100_000, memory_entries=1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")  # readers don't block the writer
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS equity ("
+            "key TEXT PRIMARY KEY, result TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS lru ON equity (last_used)")
+        self.db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM equity").fetchone()[0]
+
+    def _key(self, state_dict, params):
+        return canonical_key(state_dict) + json.dumps(params, sort_keys=True)
+
+    def _remember(self, raw_key, result):
+        self._memory[raw_key] = result
+        self._memory.move_to_end(raw_key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, state_dict, params):
+        raw_key = json.dumps([state_dict, params], sort_keys=True, default=list)
+        with self._lock:
+            if raw_key in self._memory:
+                self._memory.move_to_end(raw_key)
+                return self._memory[raw_key]
+
+        key = self._key(state_dict, params)
+        with self._lock:
+            row = self.db.execute(
+                "SELECT result, last_used FROM equity WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > _TOUCH_INTERVAL:
+                with self.db:
+                    self.db.execute(
+                        "UPDATE equity SET last_used = ? WHERE key = ?", (now, key)
+                    )
+            names = [player["name"] for player in state_dict["players"]]
+            result = from_seats(json.loads(row[0]), names)
+            self._remember(raw_key, result)
+            return result
+
+    def put(self, state_dict, params, result):
+        names = [player["name"] for player in state_dict["players"]]
+        key = self._key(state_dict, params)
+        stored = json.dumps(to_seats(result, names))
+        raw_key = json.dumps([state_dict, params], sort_keys=True, default=list)
+        with self._lock:
+            with self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO equity VALUES (?, ?, ?)",
+                    (key, stored, time.time()),
+                )
+                self.db.execute(
+                    "DELETE FROM equity WHERE key IN ("
+                    "SELECT key FROM equity ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._remember(raw_key, result)
+
+    def run(self, compute, state_dict, **params):
+        """compute(state_dict, **params), answered from the cache when the
+        same (or a suit-isomorphic) spot was computed with the same params."""
+        key_params = {"compute": compute.__name__, **params}
+        result = self.get(state_dict, key_params)
+        if result is None:
+            result = compute(state_dict, **params)
+            self.put(state_dict, key_params, result)
+        return result
@@ -0,0 +1,96 @@
+# Suit-isomorphism: spots that differ only by renaming suits (AhKh vs 2h7h
+# and AsKs vs 2s7s) have identical equities. canonicalize() maps every
+# spot to one representative so the simulator, the cache and any
+# precomputed tables only ever see that representative.
+import json
+
+from src.cards import decode_card, encode_cards
+
+_STREETS = ("flop", "turn", "river")
+
+
+def _groups(state_dict):
+    """Known cards as int lists, one group per player hand then per street
+    (None where unknown)."""
+    groups = [encode_cards(player["hand"]) for player in state_dict["players"]]
+    groups += [encode_cards(state_dict["table"].get(street)) for street in _STREETS]
+    return groups
+
+
+def suit_permutation(state_dict):
+    """perm[suit_index] -> canonical suit index for this spot.
+
+    Each suit gets a signature: the ranks it holds in every group. Suits
+    are ordered by signature (largest first). Two suits with the same
+    signature can be swapped without changing the spot, so ties may be
+    broken either way and the canonical form is still unique.
+    """
+    if any(player.get("range") is not None for player in state_dict["players"]):
+        # range text names suits literally ("AhKh"), so leave suits alone
+        return [0, 1, 2, 3]
+    groups = [group for group in _groups(state_dict) if group is not None]
+    signatures = [
+        tuple(
+            tuple(
+                sorted((card >> 2 for card in group if card & 3 == suit), reverse=True)
+            )
+            for group in groups
+        )
+        for suit in range(4)
+    ]
+    order = sorted(range(4), key=lambda suit: signatures[suit], reverse=True)
+    perm = [0] * 4
+    for canonical_suit, suit in enumerate(order):
+        perm[suit] = canonical_suit
+    return perm
+
+
+def invert(perm):
+    inverse = [0] * 4
+    for suit, target in enumerate(perm):
+        inverse[target] = suit
+    return inverse
+
+
+def permute_suits(state_dict, perm):
+    """Copy of state_dict with every known card's suit renamed by perm.
+    Cards inside a hand or street are put in a fixed (descending) order."""
+
+    def relabel(cards):
+        if cards is None:
+            return None
+        codes = sorted(
+            ((code & ~3) | perm[code & 3] for code in encode_cards(cards)), reverse=True
+        )
+        return [decode_card(code) for code in codes]
+
+    state = dict(state_dict)
+    state["players"] = [
+        {**player, "hand": relabel(player["hand"])} for player in state_dict["players"]
+    ]
+    state["table"] = {
+        **state_dict["table"],
+        **{street: relabel(state_dict["table"].get(street)) for street in _STREETS},
+    }
+    return state
+
+
+def canonicalize(state_dict):
+    """Return (canonical state_dict, perm).
+
+    perm maps original suit indices (cards.SUITS order) to canonical ones;
+    invert(perm) maps the canonical spot's suits back. Seat order and
+    player names are kept, so per-player results need no remapping.
+    """
+    perm = suit_permutation(state_dict)
+    return permute_suits(state_dict, perm), perm
+
+
+def canonical_key(state_dict):
+    """Compact string identifying a spot up to suit renaming, e.g. for caches."""
+    canonical, _ = canonicalize(state_dict)
+    key = [canonical["game_type"], _groups(canonical)]
+    ranges = [player.get("range") for player in state_dict["players"]]
+    if any(spec is not None for spec in ranges):
+        key.append(ranges)
+    return json.dumps(key, default=list)  # default: range matrices as nested lists
@@ -0,0 +1,47 @@
+# Compact integer card encoding shared by the fast evaluation paths.
+# A card is a single int in 0..51: (rank - 2) * 4 + suit_index, so
+# code >> 2 gives the rank index (0..12) and code & 3 gives the suit index.
+
+RANKS = list(range(2, 15))  # 2-14 where 11-14 are J, Q, K, A
+SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"]
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+
+# short text form, e.g. "Ah" or "Td"
+RANK_CHARS = "23456789TJQKA"
+SUIT_CHARS = "hdcs"  # same order as SUITS
+
+NUM_CARDS = 52
+
+
+def encode_card(rank, suit):
+    """Encode a (rank, suit) pair, e.g. (14, 'Hearts'), as an int in 0..51."""
+    return (rank - 2) * 4 + SUIT_INDEX[suit]
+
+
+def decode_card(code):
+    """Inverse of encode_card: returns the (rank, suit) tuple for a card int."""
+    return (code >> 2) + 2, SUITS[code & 3]
+
+
+def encode_cards(cards):
+    """Encode a list of (rank, suit) tuples. None stays None."""
+    if cards is None:
+        return None
+    return [encode_card(rank, suit) for rank, suit in cards]
+
+
+def parse_cards(text):
+    """Parse card text like "AhKh" or "Td 9d 2c" into (rank, suit) tuples.
+    Empty text gives None (unknown cards)."""
+    text = text.replace(" ", "")
+    if not text:
+        return None
+    if len(text) % 2 or any(
+        text[i] not in RANK_CHARS or text[i + 1] not in SUIT_CHARS
+        for i in range(0, len(text), 2)
+    ):
+        raise ValueError(f"Can't parse cards {text!r}.")
+    return [
+        (RANK_CHARS.index(text[i]) + 2, SUITS[SUIT_CHARS.index(text[i + 1])])
+        for i in range(0, len(text), 2)
+    ]
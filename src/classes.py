@@ -26,10 +26,15 @@ from itertools import combinations
 #     "game_type": "texas"  # or "omaha"
 # }
 
-from src.eval_funcs import evaluate_hand
+from src.cards import NUM_CARDS, decode_card, encode_card, encode_cards
+from src.eval_funcs import SEVEN_CARD_KEYS, Evaluation, omaha_board, omaha_strength
+from src.eval_funcs import texas_board, texas_strength
+from src.eval_funcs import HAND_STATES, hand_state, state_strength
 
 
 class Deck:
+    __slots__ = ("cards",)
+
     def __init__(self, cards):
         self.cards = cards
 
@@ -55,15 +60,98 @@ class Deck:
 
 
 class Card:
+    __slots__ = ("rank", "suit", "code", "key")
+
     def __init__(self, rank, suit):
         self.rank = rank
         self.suit = suit
+        self.code = encode_card(rank, suit)  # integer form used by the evaluator
+        self.key = SEVEN_CARD_KEYS[self.code]  # summed by evaluate_hand
 
     def __repr__(self):
         return f"{self.rank} of {self.suit}"
 
 
+# One shared Card per card int; dealing hands these out instead of
+# building 52 new Card objects for every game.
+CARDS = [Card(*decode_card(code)) for code in range(NUM_CARDS)]
+
+
+class IntDeck:
+    """Reusable deck backed by a fixed array of card ints.
+
+    The live cards are order[:size]; position[card] says where each card
+    sits, so a known card is removed in O(1) by swapping it behind the
+    live section. draw() is one step of a Fisher-Yates shuffle, so only
+    the cards actually needed are ever shuffled, and reset() makes every
+    card live again without allocating anything.
+
+    draw() and find_and_pop_card() hand out the shared Card objects, so
+    it can stand in for Deck inside Game.
+    """
+
+    __slots__ = ("order", "position", "size", "rng")
+
+    def __init__(self, rng=random):
+        self.order = list(range(NUM_CARDS))
+        self.position = list(range(NUM_CARDS))
+        self.size = NUM_CARDS
+        self.rng = rng
+
+    def reset(self):
+        self.size = NUM_CARDS
+
+    def __len__(self):
+        return self.size
+
+    def _swap_out(self, index):
+        # move order[index] just behind the live section
+        last = self.size - 1
+        order, position = self.order, self.position
+        card, other = order[index], order[last]
+        order[index], order[last] = other, card
+        position[other], position[card] = index, last
+        self.size = last
+        return card
+
+    def remove(self, code):
+        if self.position[code] >= self.size:
+            raise ValueError(
+                f"Card {CARDS[code]} not found in deck. You must have popped it already!"
+            )
+        self._swap_out(self.position[code])
+
+    def draw_code(self):
+        if self.size == 0:
+            return None
+        return self._swap_out(int(self.rng.random() * self.size))
+
+    def deal(self, n):
+        """Draw n card ints."""
+        return [self.draw_code() for _ in range(n)]
+
+    # Deck-compatible interface
+    @property
+    def cards(self):
+        return [CARDS[code] for code in self.order[: self.size]]
+
+    def shuffle(self):
+        pass  # every draw is already uniformly random
+
+    def draw(self):
+        code = self.draw_code()
+        return None if code is None else CARDS[code]
+
+    def find_and_pop_card(self, rank, suit):
+        code = encode_card(rank, suit)
+        self.remove(code)
+        return CARDS[code]
+
+
 class Player:
+    # strength is set by Game.compute_winner
+    __slots__ = ("cards", "deck", "name", "known_cards", "strength")
+
     def __init__(self, deck, name=None, known_cards=None):
         self.cards = []
         self.deck = deck
@@ -82,19 +170,39 @@ class Player:
     def show_hand(self):
         return self.cards
 
+    @property
+    def evaluation(self):
+        # decoded lazily: the showdown itself only compares strength ints
+        return Evaluation.from_strength(self.strength)
+
 
 # pass some kind of state dict here - that can be checked at each round.
 class Game:
-    def __init__(self, num_players, state_dict=None, verbose=True):
+    # no per-instance __dict__: a simulation creates one Game per hand.
+    # _profiled is only set under profiling.profile_games()
+    __slots__ = (
+        "verbose",
+        "state_dict",
+        "omaha",
+        "deck",
+        "players",
+        "table",
+        "open_cards",
+        "burnt_cards",
+        "dead",
+        "known_board",
+        "_profiled",
+    )
+
+    def __init__(self, num_players, state_dict=None, verbose=True, deck=None):
         self.verbose = verbose
         self.state_dict = state_dict
         self.omaha = state_dict["game_type"] == "omaha"
 
-        ranks = list(range(2, 15))  # 2-14 where 11-14 are J, Q, K, A
-        # suits = [1,2,3,4]
-        suits = ["Hearts", "Diamonds", "Clubs", "Spades"]
-        cards = [Card(rank, suit) for rank in ranks for suit in suits]
-        self.deck = Deck(cards)
+        # pass the same IntDeck to every Game of a simulation to avoid
+        # rebuilding and reshuffling 52 cards per hand
+        self.deck = deck if deck is not None else IntDeck()
+        self.deck.reset()
 
         self.players = [
             Player(self.deck, player["name"], player["hand"])
@@ -104,217 +212,113 @@ class Game:
         self.table = Table(self.deck)
 
         self.open_cards = []
-        self.deck.shuffle()
         self.burnt_cards = []
+        self.dead = 0  # bit per card already placed; see _reserve
+        self.known_board = {}  # street -> known Cards, filled by start()
+
+    def _reserve(self, code):
+        # one bit per card in self.dead makes the duplicate check O(1)
+        bit = 1 << code
+        if self.dead & bit:
+            raise ValueError(
+                f"Card {CARDS[code]} is used more than once in the state_dict."
+            )
+        self.dead |= bit
+        self.deck.remove(code)
+        return CARDS[code]
 
     def start(self):
+        # Every known card leaves the deck before anything is dealt, so
+        # random cards can never collide with them later. A known board
+        # card wins over the same card in a known hand: that player is
+        # dealt a random card in its place.
+        table = self.state_dict["table"]
+        for street in ("flop", "turn", "river"):
+            known = encode_cards(table.get(street))
+            if known is not None:
+                self.known_board[street] = [self._reserve(code) for code in known]
+        board = self.dead
+
+        redraw = []
+        for player in self.players:
+            for code in encode_cards(player.known_cards) or ():
+                if board & (1 << code):
+                    if self.verbose:
+                        print(
+                            f"{CARDS[code]} is on the board, "
+                            f"dealing {player.name} another card."
+                        )
+                    redraw.append(player)
+                else:
+                    player.cards.append(self._reserve(code))
+
+        hand_size = 4 if self.omaha else 2
         for player in self.players:
-            # for player in state_dict['players']:
             if player.known_cards is None:
-                player.draw_card()
-                player.draw_card()
-                if self.omaha:
+                for _ in range(hand_size):
                     player.draw_card()
-                    player.draw_card()
-            else:
-                for card in player.known_cards:
-                    # print(card)
-                    setup_card = self.deck.find_and_pop_card(
-                        card[0], card[1]
-                    )  # rank and suit
-                    if setup_card:
-                        player.cards.append(setup_card)
+        for player in redraw:
+            player.draw_card()
 
-            if self.verbose:
+        if self.verbose:
+            for player in self.players:
                 print("Player:", player.name, player.show_hand())
 
-    def flop(self):
-        known_flop = self.state_dict["table"]["flop"]
-
-        if known_flop is None:
-            burn_card = self.deck.draw()  # Burn a card
-            self.burnt_cards.append(burn_card)
-            for _ in range(3):
+    def _deal_street(self, street, size):
+        self.burnt_cards.append(self.deck.draw())
+        known = self.known_board.get(street)
+        if known is None:
+            for _ in range(size):
                 self.table.draw_card(self.deck)
         else:
-            for card in known_flop:
-                setup_card = None
-                # interesting edge case to deal with: if we know the flop, we may have to remove those cards from the other players and give them new ones.
-                for player in self.players:
-                    card_to_remove = next(
-                        (
-                            c
-                            for c in player.cards
-                            if c.rank == card[0] and c.suit == card[1]
-                        ),
-                        None,
-                    )
-                    if card_to_remove is None:
-                        # setup_card = self.deck.find_and_pop_card(card[0], card[1])
-                        continue
-                    else:
-                        if self.verbose:
-                            print(
-                                f"Removing {card_to_remove} from {player.name}'s hand to set up the flop."
-                            )
-                        player.remove_card(
-                            card_to_remove
-                        )  # take out this card from the player's hands
-                        player.draw_card()  # give them a new card from the deck
-                        setup_card = Card(
-                            card[0], card[1]
-                        )  # create this setup_card, to be added to table
-
-                if setup_card is None:
-                    self.table.cards.append(
-                        self.deck.find_and_pop_card(card[0], card[1])
-                    )
-                else:
-                    self.table.cards.append(setup_card)
-
-            # burn at the end because we know the flop
-            burn_card = self.deck.draw()
-            self.burnt_cards.append(burn_card)
-
+            self.table.cards.extend(known)
         if self.verbose:
-            print("Flop:", self.table.show_table())
+            print(f"{street.capitalize()}:", self.table.show_table())
         self.open_cards = self.table.show_table()
 
-    def turn(self):
-        known_turn = self.state_dict["table"]["turn"]
-        if known_turn is None:
-            burn_card = self.deck.draw()
-            self.burnt_cards.append(burn_card)
-            self.table.draw_card(self.deck)
-        else:
-            for card in known_turn:
-                setup_card = None
-                # interesting edge case to deal with: if we know the turn, we may have to remove those cards from the other players and give them new ones. They may also be in the burnt cards! FIXME
-                for player in self.players:
-                    card_to_remove = next(
-                        (
-                            c
-                            for c in player.cards
-                            if c.rank == card[0] and c.suit == card[1]
-                        ),
-                        None,
-                    )
-                    if card_to_remove is None:
-                        # setup_card = self.deck.find_and_pop_card(card[0], card[1])
-                        continue
-                    else:
-                        if self.verbose:
-                            print(
-                                f"Removing {card_to_remove} from {player.name}'s hand to set up the flop."
-                            )
-                        player.remove_card(
-                            card_to_remove
-                        )  # take out this card from the player's hands
-                        player.draw_card()  # give them a new card from the deck
-                        setup_card = Card(
-                            card[0], card[1]
-                        )  # create this setup_card, to be added to table
-
-                burnt_card_to_replace = next(
-                    (
-                        c
-                        for c in self.burnt_cards
-                        if c.rank == card[0] and c.suit == card[1]
-                    ),
-                    None,
-                )
-                if burnt_card_to_replace:
-                    if self.verbose:
-                        print(
-                            f"Removing {burnt_card_to_replace} from burnt cards to set up the turn."
-                        )
-                    self.burnt_cards.remove(burnt_card_to_replace)
-                    setup_card = Card(card[0], card[1])
-                    # self.burnt_cards.append(self.deck.draw()) #replace the burnt card with a new one from the deck
-
-                if setup_card is None:  # not in player's hands, not in burnt cards
-                    self.table.cards.append(
-                        self.deck.find_and_pop_card(card[0], card[1])
-                    )
-                else:
-                    self.table.cards.append(setup_card)
-
-                burn_card = self.deck.draw()
-                self.burnt_cards.append(burn_card)
-        if self.verbose:
-            print("Turn:", self.table.show_table())
+    def flop(self):
+        self._deal_street("flop", 3)
 
-        self.open_cards = self.table.show_table()
+    def turn(self):
+        self._deal_street("turn", 1)
 
     def river(self):
-        burn_card = self.deck.draw()
-        self.burnt_cards.append(burn_card)
-        self.table.draw_card(self.deck)
-        if self.verbose:
-            print("River:", self.table.show_table())
-        self.open_cards = self.table.show_table()
+        self._deal_street("river", 1)
 
     def compute_winner(self):
         if self.verbose:
             print(len(self.burnt_cards), "burnt cards:", self.burnt_cards)
 
+        board = [card.code for card in self.open_cards]
+
         # Evaluate all hands
         if self.omaha:
-            # need 2 cards from hand, 3 from board. need to evaluate all combinations
+            # need 2 cards from hand, 3 from board: the board triples are
+            # prepared once and shared by every player
+            board_state = omaha_board(board)
             for player in self.players:
-                best_evaluation = None
-                hand_combos = list(combinations(player.cards, 2))
-                board_combos = list(combinations(self.open_cards, 3))
-                for hand_pair in hand_combos:
-                    for board_triplet in board_combos:
-                        combined_cards = list(hand_pair) + list(board_triplet)
-                        current_evaluation = evaluate_hand(player, combined_cards)
-                        if not best_evaluation or best_evaluation < current_evaluation:
-                            best_evaluation = current_evaluation
-                player.evaluation = best_evaluation
-                if self.verbose:
-                    print(
-                        f"{player.name} has evaluation {player.evaluation.eval} "
-                        f"with cards {player.evaluation.primary_cards}"
-                    )
-
+                player.strength = omaha_strength(
+                    [card.code for card in player.cards], board_state
+                )
         else:
+            # the board's rank key and flush draw are likewise built once;
+            # each player then only adds their two hole cards
+            board_state = texas_board(board)
+            for player in self.players:
+                player.strength = texas_strength(
+                    [card.code for card in player.cards], board_state
+                )
+
+        if self.verbose:
             for player in self.players:
-                player.evaluation = evaluate_hand(player, self.open_cards)
-                if self.verbose:
-                    print(
-                        f"{player.name} has evaluation {player.evaluation.eval} "
-                        f"with cards {player.evaluation.primary_cards}"
-                    )
-
-        # Find highest hand rank
-        max_eval = max(player.evaluation.eval for player in self.players)
-        potential_winners = [p for p in self.players if p.evaluation.eval == max_eval]
-
-        if len(potential_winners) == 1:
-            winner = potential_winners[0]
-            if self.verbose:
                 print(
-                    f"The winner is {winner.name} with {(winner.evaluation.eval)} "
-                    f"({winner.evaluation.primary_cards})"
+                    f"{player.name} has evaluation {player.evaluation.eval} "
+                    f"with cards {player.evaluation.primary_cards}"
                 )
-            return winner.name
-
-        # Compare primary cards and kickers
-        best_hand = None
-        winners = []
-
-        for player in potential_winners:
-            if not best_hand:
-                best_hand = player.evaluation
-                winners = [player]
-            elif player.evaluation < best_hand:
-                continue
-            elif best_hand < player.evaluation:
-                best_hand = player.evaluation
-                winners = [player]
-            else:
-                winners.append(player)
+
+        # Strengths are fully ordered ints, so ties are exact equality
+        best = max(player.strength for player in self.players)
+        winners = [p for p in self.players if p.strength == best]
 
         if len(winners) == 1:
             if self.verbose:
@@ -332,6 +336,48 @@ class Game:
                 )
             return "Tie"
 
+    def runout_outcomes(self):
+        """Outcome counts (like simulate_games) over every way the rest of
+        the board can come, for the hands dealt. Call after flop() or
+        turn(); known later streets stay fixed.
+
+        In Hold'em each player's cards and the open board are folded into
+        an incremental hand state once, so every runout costs one
+        HAND_STATES addition per card and one state_strength lookup.
+        """
+        board = [card.code for card in self.open_cards]
+        if len(board) < 3:
+            raise ValueError("Deal the flop before enumerating runouts.")
+        board += [
+            card.code
+            for street in ("turn", "river")[len(board) - 3 :]
+            for card in self.known_board.get(street, ())
+        ]
+        holes = [[card.code for card in player.cards] for player in self.players]
+        used = set(board).union(*holes)
+        live = [code for code in range(52) if code not in used]
+
+        if self.omaha:
+            runouts = (
+                [omaha_strength(hole, board_state) for hole in holes]
+                for board_state in (
+                    omaha_board(board + list(cards))
+                    for cards in combinations(live, 5 - len(board))
+                )
+            )
+        else:
+            runouts = _texas_runouts(holes, board, live)
+
+        names = [player.name for player in self.players]
+        outcomes = dict.fromkeys(names + ["Tie"], 0)
+        for strengths in runouts:
+            best = max(strengths)
+            if strengths.count(best) > 1:
+                outcomes["Tie"] += 1
+            else:
+                outcomes[names[strengths.index(best)]] += 1
+        return outcomes
+
     # def compute_winner(self):
     #     if self.verbose:
     #         print(len(self.burnt_cards), "burnt cards:", self.burnt_cards)
@@ -362,7 +408,25 @@ class Game:
     #             return 'Tie'
 
 
+def _texas_runouts(holes, board, live):
+    """Per-player strengths for every completion of a 3 to 5 card board."""
+    states = [hand_state(hole + board) for hole in holes]
+    if len(board) == 5:
+        yield [state_strength(state) for state in states]
+        return
+    for i, turn in enumerate(live):
+        turned = [state + HAND_STATES[turn] for state in states]
+        if len(board) == 4:
+            yield [state_strength(state) for state in turned]
+            continue
+        for river in live[i + 1 :]:
+            add = HAND_STATES[river]
+            yield [state_strength(state + add) for state in turned]
+
+
 class Table:
+    __slots__ = ("cards", "deck")
+
     def __init__(self, deck):
         self.cards = []
         self.deck = deck
@@ -374,6 +438,26 @@ class Table:
         return self.cards
 
 
+def simulate_games(state_dict, sims, deck=None):
+    """Play `sims` games of a state_dict one Game at a time.
+
+    Returns outcome counts keyed like compute_winner results (each
+    player's name plus "Tie"), the same shape as batch_eval.simulate_batch.
+    Wrap the call in profiling.profile_games() to see where the time goes.
+    """
+    deck = deck if deck is not None else IntDeck()
+    names = [player["name"] for player in state_dict["players"]]
+    outcomes = dict.fromkeys(names + ["Tie"], 0)
+    for _ in range(sims):
+        game = Game(len(names), state_dict, verbose=False, deck=deck)
+        game.start()
+        game.flop()
+        game.turn()
+        game.river()
+        outcomes[game.compute_winner()] += 1
+    return outcomes
+
+
 ##Tests
 
 
@@ -0,0 +1,339 @@
+# Command line entry point:
+#     poker-mc batch spots.jsonl -o equities.jsonl --sims 20000 --workers 8
+#     poker-mc bench --compare bench.json   (see src/bench.py)
+#     poker-mc profile --players 6 --omaha  (see src/profiling.py)
+#
+# Records are streamed in and handed to long-lived worker processes in
+# chunks (each worker builds the evaluator tables and opens the cache
+# once), and results are written in input order as chunks come back, so
+# memory stays bounded however long the input is. A checkpoint next to
+# the output lets an interrupted job pick up where it stopped.
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from src import bench, jit, profiling
+from src.cache import EquityCache
+from src.batch_eval import simulate_batch
+from src.cards import parse_cards
+from src.classes import simulate_games
+from src.equity import run_adaptive, run_equity
+from src.ranges import range_equity
+
+RESULT_FIELDS = ("win_prob", "std_error", "ci", "sims", "exact", "stopped", "variance")
+
+# per-process settings, filled in once by _init_worker
+_options = {}
+
+
+def read_records(path):
+    """Yield raw records from a .jsonl file (one state_dict per line, with
+    an optional "id") or a .csv file. They are parsed by the workers, so
+    one bad record becomes an error line instead of stopping the job.
+
+    CSV columns: id (optional), game_type (default texas), hands (hands
+    separated by ";", empty for a random hand, e.g. "AhKh;;QsQc"), flop,
+    turn and river (e.g. "Td9d2c").
+    """
+    path = Path(path)
+    with open(path, newline="") as f:
+        if path.suffix == ".csv":
+            yield from csv.DictReader(f)
+        else:
+            yield from (line for line in f if line.strip())
+
+
+def _from_csv(row):
+    record = {
+        "players": [
+            {"name": f"Player{i + 1}", "hand": parse_cards(hand)}
+            for i, hand in enumerate(row["hands"].split(";"))
+        ],
+        "table": {
+            street: parse_cards(row.get(street) or "")
+            for street in ("flop", "turn", "river")
+        },
+        "game_type": row.get("game_type") or "texas",
+    }
+    if row.get("id"):
+        record["id"] = row["id"]
+    return record
+
+
+def _init_worker(options):
+    _options.clear()
+    _options.update(options)
+    if options["cache"]:
+        _options["equity_cache"] = EquityCache(options["cache"])
+
+
+def _equity(record, index):
+    state = {key: record[key] for key in ("players", "table", "game_type")}
+    seed = None if _options["seed"] is None else [_options["seed"], index]
+    if any(player.get("range") is not None for player in state["players"]):
+        compute, params = range_equity, {"sims": _options["sims"]}
+    elif _options["target_se"] is not None:
+        compute = run_adaptive
+        params = {"target_se": _options["target_se"], "max_sims": _options["sims"]}
+    else:
+        compute, params = run_equity, {"sims": _options["sims"]}
+        for reduction in ("stratify", "pool_seats"):
+            if _options.get(reduction):
+                params[reduction] = True
+
+    equity_cache = _options.get("equity_cache")
+    if equity_cache is None:
+        return compute(state, seed=seed, **params)
+    # the seed is left out of the key so repeated spots are cache hits
+    key_params = {"compute": compute.__name__, **params}
+    result = equity_cache.get(state, key_params)
+    if result is None:
+        result = compute(state, seed=seed, **params)
+        equity_cache.put(state, key_params, result)
+    return result
+
+
+def _solve_chunk(chunk):
+    rows = []
+    for index, raw in chunk:
+        try:
+            record = _from_csv(raw) if isinstance(raw, dict) else json.loads(raw)
+            result = _equity(record, index)
+            row = {"index": index, "id": record.get("id")}
+            row.update(
+                {field: result[field] for field in RESULT_FIELDS if field in result}
+            )
+        except Exception as err:  # whatever is wrong with one record, keep going
+            row = {"index": index, "error": f"{type(err).__name__}: {err}"}
+        rows.append(row)
+    return rows
+
+
+def _write_checkpoint(checkpoint, records, offset):
+    tmp = Path(f"{checkpoint}.tmp")
+    tmp.write_text(json.dumps({"records": records, "offset": offset}))
+    os.replace(tmp, checkpoint)
+
+
+def run_batch(
+    input_path,
+    output_path,
+    sims=20_000,
+    target_se=None,
+    workers=1,
+    chunk_size=64,
+    seed=None,
+    cache=None,
+    restart=False,
+    progress=None,
+    stratify=False,
+    pool_seats=False,
+):
+    """Compute equities for every record of input_path into output_path
+    (JSONL, one line per record in input order).
+
+    Each line has the record's "index" and "id" plus win_prob, std_error,
+    ci, sims and exact (and "stopped" with target_se), or an "error".
+    With a seed, record i uses the stream [seed, i], so results don't
+    depend on how records were spread over workers. Unless `restart`, a
+    previous run's checkpoint is honoured and finished records skipped.
+    stratify and pool_seats turn on run_equity's variance reductions for
+    fixed-size runs; lines then also carry "variance".
+    Returns the number of records written by this call.
+    """
+    output_path = Path(output_path)
+    checkpoint = Path(f"{output_path}.ckpt")
+    done, offset = 0, 0
+    if checkpoint.exists() and output_path.exists() and not restart:
+        saved = json.loads(checkpoint.read_text())
+        done, offset = saved["records"], saved["offset"]
+
+    options = {
+        "sims": sims,
+        "target_se": target_se,
+        "seed": seed,
+        "cache": cache,
+        "stratify": stratify,
+        "pool_seats": pool_seats,
+    }
+    records = islice(enumerate(read_records(input_path)), done, None)
+    chunks = iter(lambda: list(islice(records, chunk_size)), [])
+
+    written = 0
+    with open(output_path, "r+b" if done else "wb") as out:
+        out.seek(offset)
+        out.truncate()  # drop lines written after the last checkpoint
+
+        def write(rows):
+            nonlocal done, written
+            for row in rows:
+                out.write((json.dumps(row) + "\n").encode())
+            out.flush()
+            done += len(rows)
+            written += len(rows)
+            _write_checkpoint(checkpoint, done, out.tell())
+            if progress:
+                progress(done)
+
+        if workers == 1:
+            _init_worker(options)
+            for chunk in chunks:
+                write(_solve_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(options,),
+                mp_context=jit.mp_context(),
+            ) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_solve_chunk, chunk))
+                    if len(pending) >= 2 * workers:  # bounds memory
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="poker-mc")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser(
+        "batch", help="compute equities for a JSONL or CSV file of spots"
+    )
+    batch.add_argument("input", help=".jsonl of state_dicts or .csv of spots")
+    batch.add_argument("-o", "--output", required=True, help="JSONL results")
+    batch.add_argument("--sims", type=int, default=20_000)
+    batch.add_argument(
+        "--target-se",
+        type=float,
+        default=None,
+        help="sample adaptively to this standard error (--sims becomes the cap)",
+    )
+    batch.add_argument("--workers", type=int, default=os.cpu_count())
+    batch.add_argument("--chunk-size", type=int, default=64)
+    batch.add_argument("--seed", type=int, default=None)
+    batch.add_argument("--cache", default=None, help="SQLite equity cache to share")
+    batch.add_argument(
+        "--restart", action="store_true", help="ignore an existing checkpoint"
+    )
+    batch.add_argument(
+        "--stratify", action="store_true", help="stratify runouts on the river card"
+    )
+    batch.add_argument(
+        "--pool-seats",
+        action="store_true",
+        help="pool the equity of players with unknown cards",
+    )
+
+    bench_parser = commands.add_parser(
+        "bench", help="measure throughput; save or compare JSON baselines"
+    )
+    bench_parser.add_argument("--only", help="glob of benchmark names, e.g. 'batch_*'")
+    bench_parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiply the work per benchmark"
+    )
+    bench_parser.add_argument("--save", help="write the results as a baseline")
+    bench_parser.add_argument("--compare", help="baseline to compare against")
+    bench_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="slowdown that counts as a regression (default 0.10)",
+    )
+
+    profile = commands.add_parser(
+        "profile", help="per-stage timings of random hands (optionally cProfile/perf)"
+    )
+    profile.add_argument("--players", type=int, default=2)
+    profile.add_argument("--omaha", action="store_true")
+    profile.add_argument("--sims", type=int, default=10_000)
+    profile.add_argument("--engine", choices=["game", "batch"], default="game")
+    profile.add_argument(
+        "--every", type=int, default=1, help="time only every Nth game"
+    )
+    profile.add_argument(
+        "--cprofile", metavar="PATH", help="also run under cProfile, saving to PATH"
+    )
+    profile.add_argument(
+        "--perf", action="store_true", help="enable the perf trampoline (3.12+)"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "bench":
+        return _bench(args)
+    if args.command == "profile":
+        return _profile(args)
+
+    written = run_batch(
+        args.input,
+        args.output,
+        sims=args.sims,
+        target_se=args.target_se,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+        cache=args.cache,
+        restart=args.restart,
+        stratify=args.stratify,
+        pool_seats=args.pool_seats,
+        progress=lambda done: print(f"{done} records", file=sys.stderr),
+    )
+    print(f"wrote {written} records to {args.output}", file=sys.stderr)
+
+
+def _bench(args):
+    def report(name, result):
+        print(f"{name:24} {result['rate']:>14,.0f} {result['unit']}")
+
+    results = bench.run_benchmarks(args.only, args.scale, progress=report)
+    if args.save:
+        bench.save_baseline(args.save, results)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\ncompared with {baseline['machine']['commit'] or args.compare}:")
+        rows = bench.compare(results, baseline, args.tolerance)
+        for name, before, after, ratio, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:24} {before:>14,.0f} -> {after:>14,.0f} ({ratio:.2f}x){flag}")
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+
+def _profile(args):
+    state = {
+        "players": [
+            {"name": f"Player{i + 1}", "hand": None} for i in range(args.players)
+        ],
+        "table": {"flop": None, "turn": None, "river": None},
+        "game_type": "omaha" if args.omaha else "texas",
+    }
+    stats = profiling.StageStats()
+
+    def run():
+        if args.engine == "batch":
+            return simulate_batch(state, args.sims, stats=stats)
+        with profiling.profile_games(stats, every=args.every):
+            return simulate_games(state, args.sims)
+
+    with profiling.perf_trampoline() if args.perf else nullcontext():
+        if args.cprofile:
+            text, _ = profiling.run_cprofile(run, path=args.cprofile)
+            print(text)
+        else:
+            run()
+    print(stats.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+# Equity runner: shards simulations across processes with reproducible,
+# independent random streams and merges the outcome counts.
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src import jit
+from src.batch_eval import (
+    STREETS,
+    count_deals,
+    deal_batch,
+    enumerate_deals,
+    known_slots,
+    known_streets,
+    new_breakdown,
+    simulate_batch,
+    street_showdowns,
+    tally,
+)
+from src.cards import decode_card
+from src.eval_funcs import HAND_CLASS_NAMES
+from src.profiling import StageStats
+
+Z_95 = 1.96  # normal quantile for the reported 95% confidence intervals
+
+
+def _split(sims, workers):
+    """Split sims into `workers` near-equal shares (earlier shards get the extra)."""
+    return [sims // workers + (i < sims % workers) for i in range(workers)]
+
+
+def _run_shard(state_dict, sims, seed_seq, breakdown=False, timed=False):
+    counters = new_breakdown(len(state_dict["players"])) if breakdown else None
+    stats = StageStats() if timed else None
+    rng = np.random.default_rng(seed_seq)
+    outcomes = simulate_batch(state_dict, sims, rng, breakdown=counters, stats=stats)
+    return outcomes, counters, stats
+
+
+def _check_positive(**counts):
+    for name, count in counts.items():
+        if count < 1:
+            raise ValueError(f"{name} must be at least 1, got {count}.")
+
+
+def _merge(total, counts):
+    """Add one set of outcome counts into a running total (None to start)."""
+    if total is None:
+        return dict(counts)
+    for name, count in counts.items():
+        total[name] += count
+    return total
+
+
+def _ci(win_prob, std_error):
+    return {
+        name: (
+            max(0.0, p - Z_95 * std_error[name]),
+            min(1.0, p + Z_95 * std_error[name]),
+        )
+        for name, p in win_prob.items()
+    }
+
+
+def build_result(outcomes, sims, exact, seed):
+    """Common result dict: counts, probabilities, standard errors and 95% CIs.
+
+    Exact results have zero standard error.
+    """
+    win_prob = {name: count / sims for name, count in outcomes.items()}
+    std_error = {
+        name: 0.0 if exact else math.sqrt(p * (1 - p) / sims)
+        for name, p in win_prob.items()
+    }
+    ci = _ci(win_prob, std_error)
+    return {
+        "outcomes": outcomes,
+        "win_prob": win_prob,
+        "std_error": std_error,
+        "ci": ci,
+        "sims": sims,
+        "exact": exact,
+        "seed": seed,
+    }
+
+
+def strata(state_dict):
+    """(street, cards) to stratify sampling on: the river, or the turn when
+    the river is known, and every card that can land there. Each card is
+    equally likely, whatever else is still unknown. None when both are
+    known."""
+    table = state_dict["table"]
+    for street in ("river", "turn"):
+        if not table.get(street):
+            slots, _ = known_slots(state_dict)
+            return street, sorted(set(range(52)) - set(slots[slots >= 0].tolist()))
+    return None
+
+
+def exchangeable_seats(state_dict):
+    """Names of the players whose cards are all unknown. Any deal with two
+    of their hands swapped is just as likely, so they share one equity."""
+    return [
+        player["name"]
+        for player in state_dict["players"]
+        if player["hand"] is None and player.get("range") is None
+    ]
+
+
+def _run_strata(state_dict, street, cards, shares, seed_seq, breakdown, timed):
+    counters = new_breakdown(len(state_dict["players"])) if breakdown else None
+    stats = StageStats() if timed else None
+    rng = np.random.default_rng(seed_seq)
+    table = state_dict["table"]
+    # the stratified street is still random overall, so its outs count
+    known = known_streets(state_dict)
+    counts = []
+    for card, n in zip(cards, shares):
+        fixed = {**state_dict, "table": {**table, street: [decode_card(card)]}}
+        outcomes = simulate_batch(
+            fixed, n, rng, breakdown=counters, stats=stats, known=known
+        )
+        counts.append((n, outcomes))
+    return counts, counters, stats
+
+
+def _reduced(strata_counts, pooled):
+    """Win probabilities and their variances from equal-weight strata, as
+    [(deals, outcome counts)], pooling the seats in `pooled`.
+
+    Outcomes are exclusive, so a pooled group wins a deal at most once and
+    its estimate is the group's win rate divided among its seats.
+    """
+    groups = {name: [name] for name in strata_counts[0][1]}
+    if len(pooled) > 1:
+        groups.update((name, pooled) for name in pooled)
+    weight = 1 / len(strata_counts)
+    win_prob, variance = {}, {}
+    for name, group in groups.items():
+        rates = [sum(counts[g] for g in group) / n for n, counts in strata_counts]
+        share = weight / len(group)
+        win_prob[name] = share * sum(rates)
+        variance[name] = share**2 * sum(
+            q * (1 - q) / n for q, (n, _) in zip(rates, strata_counts)
+        )
+    return win_prob, variance
+
+
+def exact_equity(state_dict, batch_size=50_000, breakdown=False):
+    """Exact win/tie fractions by enumerating every remaining deal,
+    batch_size deals at a time.
+
+    breakdown=True adds the hand-class and outs counters of
+    batch_eval.new_breakdown as result["breakdown"].
+    """
+    names = [player["name"] for player in state_dict["players"]]
+    counters = new_breakdown(len(names)) if breakdown else None
+    known = known_streets(state_dict)
+    wins = np.zeros(len(names), dtype=np.int64)
+    total = 0
+    for hole, board in enumerate_deals(state_dict, batch_size):
+        winner = tally(hole, board, counters, known)
+        wins += np.bincount(winner[winner >= 0], minlength=len(names))
+        total += len(board)
+
+    outcomes = {name: int(count) for name, count in zip(names, wins)}
+    outcomes["Tie"] = total - int(wins.sum())
+    result = build_result(outcomes, total, exact=True, seed=None)
+    if breakdown:
+        result["breakdown"] = counters
+    return result
+
+
+def run_equity(
+    state_dict,
+    sims,
+    workers=1,
+    seed=None,
+    exact=None,
+    breakdown=False,
+    stats=None,
+    stratify=False,
+    pool_seats=False,
+):
+    """Estimate win probabilities for a state_dict.
+
+    Each of the `workers` shards gets its own stream spawned from one
+    numpy SeedSequence, so the same (seed, workers) pair always gives the
+    same counts. With seed=None fresh entropy is drawn; it is returned as
+    "seed" so the run can be repeated.
+
+    exact=None enumerates every remaining deal instead of sampling when
+    there are no more of them than `sims` (e.g. 990 runouts on a known
+    flop heads-up); True/False force either mode.
+
+    breakdown=True also collects per-player hand-class and outs counters
+    from the same deals (see batch_eval.new_breakdown) as
+    result["breakdown"]. A profiling.StageStats passed as `stats`
+    accumulates the time every shard spent dealing and in showdowns.
+
+    Two variance reductions can be switched on for sampled runs:
+    stratify=True deals the same number of runouts with every possible
+    river card (or turn, see strata) instead of leaving it to chance, and
+    pool_seats=True gives the players with unknown cards (see
+    exchangeable_seats) their pooled equity. Neither costs extra
+    evaluations. The result then has "variance": the "methods" used, the
+    "plain_std_error" plain sampling would have had with as many deals and
+    the "reduction" in variance over it, per outcome.
+    """
+    _check_positive(sims=sims, workers=workers)
+    if exact or (exact is None and count_deals(state_dict) <= sims):
+        return exact_equity(state_dict, breakdown=breakdown)
+
+    seed_seq = np.random.SeedSequence(seed)
+    shard_seeds = seed_seq.spawn(workers)
+    timed = stats is not None
+    stratified = strata(state_dict) if stratify else None
+    if stratified:
+        street, cards = stratified
+        if sims < len(cards):
+            raise ValueError(
+                f"Stratified sampling needs at least {len(cards)} sims, "
+                "one per stratum."
+            )
+        per_card = _split(sims, len(cards))
+        # strata are dealt round-robin to the workers
+        jobs = [
+            (
+                state_dict,
+                street,
+                cards[i::workers],
+                per_card[i::workers],
+                shard_seeds[i],
+                breakdown,
+                timed,
+            )
+            for i in range(workers)
+        ]
+        run = _run_strata
+    else:
+        jobs = [
+            (state_dict, share, shard_seed, breakdown, timed)
+            for share, shard_seed in zip(_split(sims, workers), shard_seeds)
+        ]
+        run = _run_shard
+
+    if workers == 1:
+        results = [run(*jobs[0])]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=jit.mp_context()
+        ) as pool:
+            results = list(pool.map(run, *zip(*jobs)))
+
+    outcomes = counters = None
+    strata_counts = []
+    for shard_outcomes, shard_counters, shard_stats in results:
+        if stratified:
+            strata_counts.extend(shard_outcomes)
+            for _, stratum_outcomes in shard_outcomes:
+                outcomes = _merge(outcomes, stratum_outcomes)
+        else:
+            outcomes = _merge(outcomes, shard_outcomes)
+        if breakdown:
+            counters = _merge(counters, shard_counters)
+        if timed:
+            stats.merge(shard_stats)
+    result = build_result(outcomes, sims, exact=False, seed=seed_seq.entropy)
+    if breakdown:
+        result["breakdown"] = counters
+    if stratify or pool_seats:
+        pooled = exchangeable_seats(state_dict) if pool_seats else []
+        win_prob, variance = _reduced(strata_counts or [(sims, outcomes)], pooled)
+        plain = {name: p * (1 - p) / sims for name, p in win_prob.items()}
+        result["win_prob"] = win_prob
+        result["std_error"] = {name: math.sqrt(v) for name, v in variance.items()}
+        result["ci"] = _ci(win_prob, result["std_error"])
+        result["variance"] = {
+            "methods": [
+                method
+                for method, used in (
+                    ("stratified", stratified),
+                    ("pooled seats", len(pooled) > 1),
+                )
+                if used
+            ],
+            "plain_std_error": {name: math.sqrt(v) for name, v in plain.items()},
+            "reduction": {
+                name: plain[name] / variance[name] if variance[name] else None
+                for name in variance
+            },
+        }
+    return result
+
+
+def stream_equity(
+    state_dict,
+    target_se=0.005,
+    time_budget=None,
+    max_sims=1_000_000,
+    batch_size=5_000,
+    interval=None,
+    seed=None,
+):
+    """Adaptive sampling that yields running results as it goes.
+
+    A result dict (same fields as run_equity, plus "stopped") is yielded
+    after every `batch_size` deals, or at most once per `interval` seconds
+    when one is given. While the run continues "stopped" is None; the last
+    result says why it stopped: "target" once every outcome's standard
+    error is at most `target_se`, "time" after `time_budget` seconds,
+    "max_sims", or "exact" when enumerating was cheaper than one batch.
+    Closing the generator cancels the run.
+    """
+    _check_positive(max_sims=max_sims, batch_size=batch_size)
+    if count_deals(state_dict) <= batch_size:
+        result = exact_equity(state_dict)
+        result["stopped"] = "exact"
+        yield result
+        return
+
+    seed_seq = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(seed_seq)
+    started = last_yield = time.perf_counter()
+
+    outcomes, sims = None, 0
+    while True:
+        n = min(batch_size, max_sims - sims)
+        outcomes = _merge(outcomes, simulate_batch(state_dict, n, rng))
+        sims += n
+        result = build_result(dict(outcomes), sims, exact=False, seed=seed_seq.entropy)
+        now = time.perf_counter()
+
+        if max(result["std_error"].values()) <= target_se:
+            result["stopped"] = "target"
+        elif sims >= max_sims:
+            result["stopped"] = "max_sims"
+        elif time_budget is not None and now - started >= time_budget:
+            result["stopped"] = "time"
+        else:
+            result["stopped"] = None
+            if interval is None or now - last_yield >= interval:
+                last_yield = now
+                yield result
+            continue
+        yield result
+        return
+
+
+def run_adaptive(
+    state_dict,
+    target_se=0.005,
+    time_budget=None,
+    max_sims=1_000_000,
+    batch_size=5_000,
+    seed=None,
+):
+    """Sample in batches until every outcome's standard error is at most
+    `target_se`, `time_budget` seconds have passed or `max_sims` is reached.
+
+    Lopsided spots stop after a batch or two; close multiway spots keep
+    going. The result also says why the run stopped (see stream_equity).
+    """
+    for result in stream_equity(
+        state_dict, target_se, time_budget, max_sims, batch_size, seed=seed
+    ):
+        pass
+    return result
+
+
+def run_streets(state_dict, sims, seed=None, batch_size=50_000):
+    """Equity at every street from one set of `sims` deals.
+
+    The result is run_equity's result for the showdown, plus "streets":
+    for "flop", "turn" and "river", the share of deals each player is
+    ahead with the cards out so far ("ahead", with "Tie"), their hand-class
+    distribution ("hand_classes") and how often being ahead there held up
+    at showdown ("holds_up"; None if the player was never ahead).
+    """
+    _check_positive(sims=sims, batch_size=batch_size)
+    seed_seq = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(seed_seq)
+    names = [player["name"] for player in state_dict["players"]]
+    players = len(names)
+
+    ahead = {street: np.zeros(players + 1, dtype=np.int64) for street, _ in STREETS}
+    held = {street: np.zeros(players, dtype=np.int64) for street, _ in STREETS}
+    classes = {street: np.zeros((players, 10), dtype=np.int64) for street, _ in STREETS}
+
+    done = 0
+    while done < sims:
+        n = min(batch_size, sims - done)
+        hole, board = deal_batch(state_dict, n, rng)
+        results = street_showdowns(hole, board)
+        final = results["river"]["winner"]
+        for street, _ in STREETS:
+            leader = results[street]["winner"]
+            # ties land in the last slot
+            ahead[street] += np.bincount(
+                np.where(leader >= 0, leader, players), minlength=players + 1
+            )
+            held[street] += np.bincount(
+                leader[(leader >= 0) & (leader == final)], minlength=players
+            )
+            classes[street] += results[street]["class_counts"]
+        done += n
+
+    keys = names + ["Tie"]
+    river = {name: int(count) for name, count in zip(keys, ahead["river"])}
+    result = build_result(river, sims, exact=False, seed=seed_seq.entropy)
+    result["streets"] = {
+        street: {
+            "ahead": {
+                name: int(count) / sims for name, count in zip(keys, ahead[street])
+            },
+            "hand_classes": {
+                name: {
+                    HAND_CLASS_NAMES[c]: int(classes[street][i, c]) / sims
+                    for c in HAND_CLASS_NAMES
+                }
+                for i, name in enumerate(names)
+            },
+            "holds_up": {
+                name: (
+                    int(held[street][i]) / int(ahead[street][i])
+                    if ahead[street][i]
+                    else None
+                )
+                for i, name in enumerate(names)
+            },
+        }
+        for street, _ in STREETS
+    }
+    return result
@@ -1,9 +1,424 @@
 # takes in a hand, and the open cards on the table
 # returns the rank of the hand
 # from classes import Card, Deck, Player, Game, Table
+from array import array
+from itertools import combinations
+
+# Hand strengths are plain ints: the hand class sits in bits 20+ and the
+# ranks that decide ties are packed as 4-bit nibbles below it (highest
+# first, starting at bit 16). A larger int is always a better hand, so two
+# hands compare with a single integer comparison.
+
+HIGH_CARD = 1
+PAIR = 2
+TWO_PAIR = 3
+THREE_OF_A_KIND = 4
+STRAIGHT = 5
+FLUSH = 6
+FULL_HOUSE = 7
+FOUR_OF_A_KIND = 8
+STRAIGHT_FLUSH = 9
+
+HAND_CLASS_NAMES = {
+    HIGH_CARD: "High Card",
+    PAIR: "Pair",
+    TWO_PAIR: "Two Pair",
+    THREE_OF_A_KIND: "Three of a Kind",
+    STRAIGHT: "Straight",
+    FLUSH: "Flush",
+    FULL_HOUSE: "Full House",
+    FOUR_OF_A_KIND: "Four of a Kind",
+    STRAIGHT_FLUSH: "Straight Flush",
+}
+
+CLASS_SHIFT = 20
+SUIT_BITS = 12  # each card key carries a 3-bit counter per suit in its low bits
+SUIT_MASK = (1 << SUIT_BITS) - 1
+
+# How many of the packed ranks are "primary" cards (the rest are kickers),
+# matching the layout the original Evaluation objects used.
+_PRIMARY_COUNT = {1: 0, 2: 1, 3: 2, 4: 1, 5: 1, 6: 5, 7: 2, 8: 1, 9: 1}
+
+
+def _build_straight_table():
+    """STRAIGHT_HIGH[rank_mask] -> high rank of the best straight, or 0."""
+    table = [0] * 8192
+    windows = [(0b11111 << low, low + 6) for low in range(9)]  # 2-6 ... 10-A
+    windows.append((0b1000000001111, 5))  # wheel: A-2-3-4-5
+    for mask in range(8192):
+        for window, high in windows:
+            if mask & window == window and high > table[mask]:
+                table[mask] = high
+    return table
+
+
+def _build_top_tables():
+    """TOP[k][rank_mask] -> the k highest ranks in the mask, packed as nibbles."""
+    top = [[0] * 8192]
+    for k in range(1, 6):
+        previous = top[k - 1]
+        table = [0] * 8192
+        for mask in range(1, 8192):
+            high = mask.bit_length() - 1
+            table[mask] = ((high + 2) << (4 * (k - 1))) | previous[mask ^ (1 << high)]
+        top.append(table)
+    return top
+
+
+STRAIGHT_HIGH = _build_straight_table()
+TOP = _build_top_tables()
+
+
+def strength_from_masks(m1, m2, m3, m4):
+    """Strength of a non-flush hand given rank bitmasks of ranks held at
+    least once (m1), twice (m2), three times (m3) and four times (m4)."""
+    if m4:
+        quads = m4.bit_length() - 1
+        return (
+            (FOUR_OF_A_KIND << CLASS_SHIFT)
+            | ((quads + 2) << 16)
+            | (TOP[1][m1 & ~(1 << quads)] << 12)
+        )
+    if m3:
+        trips = m3.bit_length() - 1
+        rest = m2 & ~(1 << trips)
+        if rest:
+            pair = rest.bit_length() - 1
+            return (
+                (FULL_HOUSE << CLASS_SHIFT) | ((trips + 2) << 16) | ((pair + 2) << 12)
+            )
+    straight_high = STRAIGHT_HIGH[m1]
+    if straight_high:
+        return (STRAIGHT << CLASS_SHIFT) | (straight_high << 16)
+    if m3:
+        return (
+            (THREE_OF_A_KIND << CLASS_SHIFT)
+            | ((trips + 2) << 16)
+            | (TOP[2][m1 & ~(1 << trips)] << 8)
+        )
+    if m2 & (m2 - 1):  # at least two pairs
+        high = m2.bit_length() - 1
+        second = (m2 ^ (1 << high)).bit_length() - 1
+        kicker_mask = m1 & ~((1 << high) | (1 << second))
+        return (
+            (TWO_PAIR << CLASS_SHIFT)
+            | ((high + 2) << 16)
+            | ((second + 2) << 12)
+            | (TOP[1][kicker_mask] << 8)
+        )
+    if m2:
+        pair = m2.bit_length() - 1
+        return (PAIR << CLASS_SHIFT) | ((pair + 2) << 16) | (TOP[3][m1 & ~m2] << 4)
+    return (HIGH_CARD << CLASS_SHIFT) | TOP[5][m1]
+
+
+def flush_strength(mask):
+    """Strength of a flush (or straight flush) made from a suited rank mask."""
+    straight_high = STRAIGHT_HIGH[mask]
+    if straight_high:
+        return (STRAIGHT_FLUSH << CLASS_SHIFT) | (straight_high << 16)
+    return (FLUSH << CLASS_SHIFT) | TOP[5][mask]
+
+
+def _build_flush_tables():
+    flush_table = [0] * 8192
+    for mask in range(8192):
+        if mask.bit_count() >= 5:
+            flush_table[mask] = flush_strength(mask)
+
+    # FLUSH_SUIT[suit counters] -> index of the suit holding 5+ cards, or -1.
+    # With at most 7 cards only one suit can get there.
+    flush_suit = [-1] * (1 << SUIT_BITS)
+    for counters in range(1 << SUIT_BITS):
+        for suit in range(4):
+            if (counters >> (3 * suit)) & 7 >= 5:
+                flush_suit[counters] = suit
+    return flush_table, flush_suit
+
+
+def _build_flush_draw_table():
+    """FLUSH_DRAW_SUIT[suit counters] -> the suit holding 3+ cards of a
+    board of at most 5, or -1: only then can two hole cards make a flush."""
+    table = [-1] * (1 << SUIT_BITS)
+    for counters in range(1 << SUIT_BITS):
+        for suit in range(4):
+            if (counters >> (3 * suit)) & 7 >= 3:
+                table[counters] = suit
+    return table
+
+
+def _build_rank_tables():
+    """Map every multiset of 5-7 ranks (as its base-5 count key) to a strength,
+    and every multiset of exactly 7 ranks (as its SEVEN_CARD_WEIGHTS sum) to
+    an index into the list of distinct 7-card strengths.
+
+    A flush is impossible to combine with quads or a full house in 7 cards,
+    so these tables only have to resolve the non-flush hand classes.
+    """
+    table = {}
+    largest = 4 * SEVEN_CARD_WEIGHTS[12] + 3 * SEVEN_CARD_WEIGHTS[11]  # AAAAKKK
+    seven_table = array("H", [0]) * (largest + 1)
+    seven_strengths = []
+    seven_ids = {}
+    powers = [5**r for r in range(13)]
+
+    def visit(r, remaining, key, seven, m1, m2, m3, m4):
+        if r == 13:
+            if remaining <= 2:  # 5, 6 or 7 cards placed
+                table[key] = strength_from_masks(m1, m2, m3, m4)
+                if remaining == 0:
+                    strength = table[key]
+                    if strength not in seven_ids:
+                        seven_ids[strength] = len(seven_strengths)
+                        seven_strengths.append(strength)
+                    seven_table[seven] = seven_ids[strength]
+            return
+        bit = 1 << r
+        weight = SEVEN_CARD_WEIGHTS[r]
+        visit(r + 1, remaining, key, seven, m1, m2, m3, m4)
+        if remaining >= 1:
+            visit(
+                r + 1,
+                remaining - 1,
+                key + powers[r],
+                seven + weight,
+                m1 | bit,
+                m2,
+                m3,
+                m4,
+            )
+        if remaining >= 2:
+            visit(
+                r + 1,
+                remaining - 2,
+                key + 2 * powers[r],
+                seven + 2 * weight,
+                m1 | bit,
+                m2 | bit,
+                m3,
+                m4,
+            )
+        if remaining >= 3:
+            visit(
+                r + 1,
+                remaining - 3,
+                key + 3 * powers[r],
+                seven + 3 * weight,
+                m1 | bit,
+                m2 | bit,
+                m3 | bit,
+                m4,
+            )
+        if remaining >= 4:
+            visit(
+                r + 1,
+                remaining - 4,
+                key + 4 * powers[r],
+                seven + 4 * weight,
+                m1 | bit,
+                m2 | bit,
+                m3 | bit,
+                m4 | bit,
+            )
+
+    visit(0, 7, 0, 0, 0, 0, 0, 0)
+    return table, seven_table, seven_strengths
+
+
+# CARD_KEYS[code] adds 5**rank_index above the suit counters and 1 into the
+# 3-bit counter of the card's suit. Summing the keys of up to 7 cards never
+# carries, so the sum identifies the rank multiset and the suit counts.
+CARD_KEYS = [
+    ((5 ** (code >> 2)) << SUIT_BITS) | (1 << (3 * (code & 3))) for code in range(52)
+]
+# The 7-card fast path swaps the base-5 rank key for small weights whose
+# sums are distinct over every multiset of exactly 7 ranks. The largest
+# sum is under 7.9M, so SEVEN_CARD_TABLE is a flat array indexed by it
+# rather than a dict, holding 16-bit indexes into SEVEN_CARD_STRENGTHS
+# (about 16MB). 5 and 6 cards can collide with 7 under these weights, so
+# they keep CARD_KEYS and RANK_TABLE. The suit counters are the same in
+# both keys.
+SEVEN_CARD_WEIGHTS = (
+    0,
+    1,
+    5,
+    22,
+    98,
+    453,
+    2031,
+    8698,
+    22854,
+    83661,
+    262349,
+    636345,
+    1479181,
+)
+SEVEN_CARD_KEYS = [
+    (SEVEN_CARD_WEIGHTS[code >> 2] << SUIT_BITS) | (1 << (3 * (code & 3)))
+    for code in range(52)
+]
+FLUSH_TABLE, FLUSH_SUIT = _build_flush_tables()
+FLUSH_DRAW_SUIT = _build_flush_draw_table()
+RANK_TABLE, SEVEN_CARD_TABLE, SEVEN_CARD_STRENGTHS = _build_rank_tables()
+
+
+# Incremental evaluation: a hand state is one int, the card key above
+# plus, from bit STATE_SHIFT up, a 13-bit rank mask per suit. Adding a
+# card is a single addition of its HAND_STATES entry (no bit is ever set
+# twice), so a partial hand is built once and each turn or river card
+# costs one lookup and one addition:
+#
+#     flop = hand_state(hole + board[:3])
+#     state_strength(flop + HAND_STATES[turn] + HAND_STATES[river])
+STATE_SHIFT = 64
+RANK_KEY_MASK = (1 << (STATE_SHIFT - SUIT_BITS)) - 1
+HAND_STATES = [
+    CARD_KEYS[code] | (1 << (STATE_SHIFT + 13 * (code & 3) + (code >> 2)))
+    for code in range(52)
+]
+
+
+def hand_state(cards):
+    """Incremental evaluator state of up to 7 integer cards."""
+    state = 0
+    for card in cards:
+        state += HAND_STATES[card]
+    return state
+
+
+def state_strength(state):
+    """hand_strength of the 5 to 7 cards in a hand_state."""
+    suit = FLUSH_SUIT[state & SUIT_MASK]
+    if suit < 0:
+        return RANK_TABLE[(state >> SUIT_BITS) & RANK_KEY_MASK]
+    return FLUSH_TABLE[(state >> (STATE_SHIFT + 13 * suit)) & 8191]
+
+
+def hand_strength(cards):
+    """Strength of the best 5-card hand within 5 to 7 integer cards."""
+    if len(cards) == 7:
+        # unrolled: the loop costs as much as the lookups for 7 cards
+        keys = SEVEN_CARD_KEYS
+        a, b, c, d, e, f, g = cards
+        key = keys[a] + keys[b] + keys[c] + keys[d] + keys[e] + keys[f] + keys[g]
+        suit = FLUSH_SUIT[key & SUIT_MASK]
+        if suit < 0:
+            return SEVEN_CARD_STRENGTHS[SEVEN_CARD_TABLE[key >> SUIT_BITS]]
+    else:
+        key = 0
+        for card in cards:
+            key += CARD_KEYS[card]
+        suit = FLUSH_SUIT[key & SUIT_MASK]
+        if suit < 0:
+            return RANK_TABLE[key >> SUIT_BITS]
+    mask = 0
+    for card in cards:
+        if card & 3 == suit:
+            mask |= 1 << (card >> 2)
+    return FLUSH_TABLE[mask]
+
+
+def texas_board(board):
+    """Per-board work shared by every Hold'em player, for 3 to 5 board cards.
+
+    Returns (rank key, flush suit, flush mask, locked): the summed rank
+    keys of the board, the one suit holding 3+ board cards (-1 if none,
+    in which case no player can make a flush) with the board's ranks in
+    that suit, and the board's own strength when no two hole cards can
+    change it, so every player plays the board (0 otherwise).
+    """
+    key = 0
+    for card in board:
+        key += CARD_KEYS[card]
+    rank_key = key >> SUIT_BITS
+    flush_suit = FLUSH_DRAW_SUIT[key & SUIT_MASK]
+    flush_mask = 0
+    if flush_suit >= 0:
+        for card in board:
+            if card & 3 == flush_suit:
+                flush_mask |= 1 << (card >> 2)
+
+    locked = 0
+    if len(board) == 5:
+        # a royal flush can't be beaten; nor can quads with the best
+        # possible kicker, since the quads leave too few cards of any suit
+        # for a straight flush
+        if flush_mask.bit_count() == 5:
+            if FLUSH_TABLE[flush_mask] >> 16 == (STRAIGHT_FLUSH << 4) | 14:
+                locked = FLUSH_TABLE[flush_mask]
+        else:
+            strength = RANK_TABLE[rank_key]
+            if strength >> CLASS_SHIFT == FOUR_OF_A_KIND:
+                best_kicker = 13 if strength >> 16 & 15 == 14 else 14
+                if strength >> 12 & 15 == best_kicker:
+                    locked = strength
+    return rank_key, flush_suit, flush_mask, locked
+
+
+def texas_strength(hole, board_state):
+    """Strength of 2 hole cards against a texas_board() state: the same
+    int hand_strength gives for the hole cards plus the board."""
+    rank_key, flush_suit, flush_mask, locked = board_state
+    if locked:
+        return locked
+    a, b = hole
+    if flush_suit >= 0:
+        if a & 3 == flush_suit:
+            flush_mask |= 1 << (a >> 2)
+        if b & 3 == flush_suit:
+            flush_mask |= 1 << (b >> 2)
+        if flush_mask.bit_count() >= 5:
+            return FLUSH_TABLE[flush_mask]
+    return RANK_TABLE[rank_key + RANK_KEYS[a] + RANK_KEYS[b]]
+
+
+# Omaha: a hand is exactly 2 of the 4 hole cards plus 3 of the 5 board cards
+OMAHA_HOLE_PAIRS = tuple(combinations(range(4), 2))
+OMAHA_BOARD_TRIPLES = tuple(combinations(range(5), 3))
+RANK_KEYS = [5 ** (code >> 2) for code in range(52)]
+
+
+def omaha_board(board):
+    """Per-board work shared by every Omaha player: the rank key of each of
+    the 10 board triples, plus (suit, rank mask) of the monochrome triples.
+    No monochrome triple means no player can make a flush."""
+    rank_keys = set()
+    suited = []
+    for i, j, k in OMAHA_BOARD_TRIPLES:
+        a, b, c = board[i], board[j], board[k]
+        rank_keys.add(RANK_KEYS[a] + RANK_KEYS[b] + RANK_KEYS[c])
+        if a & 3 == b & 3 == c & 3:
+            suited.append((a & 3, (1 << (a >> 2)) | (1 << (b >> 2)) | (1 << (c >> 2))))
+    return tuple(rank_keys), suited
+
+
+def omaha_strength(hole, board_state):
+    """Best Omaha strength of 4 hole cards against an omaha_board() state."""
+    triple_keys, suited = board_state
+    best = 0
+    for i, j in OMAHA_HOLE_PAIRS:
+        a, b = hole[i], hole[j]
+        pair_key = RANK_KEYS[a] + RANK_KEYS[b]
+        for triple_key in triple_keys:
+            strength = RANK_TABLE[pair_key + triple_key]
+            if strength > best:
+                best = strength
+        if suited and a & 3 == b & 3:
+            pair_mask = (1 << (a >> 2)) | (1 << (b >> 2))
+            for suit, mask in suited:
+                if suit == a & 3 and FLUSH_TABLE[pair_mask | mask] > best:
+                    best = FLUSH_TABLE[pair_mask | mask]
+    return best
+
+
+def hand_class(strength):
+    """Hand class (1=high card ... 9=straight flush) of a strength int."""
+    return strength >> CLASS_SHIFT
 
 
 class Evaluation:
+    __slots__ = ("eval", "primary_cards", "kickers")
+
     def __init__(self, eval, primary_cards, kickers=None):
         self.eval = eval  # Hand rank (9=straight flush, 8=four of a kind, etc.)
         self.primary_cards = sorted(
@@ -13,6 +428,31 @@ class Evaluation:
             sorted(kickers, reverse=True) if kickers else []
         )  # Remaining cards for tiebreaks
 
+    @classmethod
+    def from_strength(cls, strength):
+        """Unpack a hand_strength int into an Evaluation.
+
+        There are only 7462 distinct strengths, so each is unpacked once
+        and the same Evaluation is returned after that: treat it as
+        read-only.
+        """
+        evaluation = _EVALUATIONS.get(strength)
+        if evaluation is None:
+            evaluation = _EVALUATIONS[strength] = cls._unpack(strength)
+        return evaluation
+
+    @classmethod
+    def _unpack(cls, strength):
+        eval = strength >> CLASS_SHIFT
+        ranks = [(strength >> shift) & 15 for shift in (16, 12, 8, 4, 0)]
+        ranks = [rank for rank in ranks if rank]
+        primary = _PRIMARY_COUNT[eval]
+        evaluation = cls(eval, [])
+        # keep the packed order: sorting would put a full house's pair above its trips
+        evaluation.primary_cards = ranks[:primary]
+        evaluation.kickers = ranks[primary:]
+        return evaluation
+
     def __lt__(self, other):
         if self.eval != other.eval:
             return self.eval < other.eval
@@ -39,108 +479,29 @@ class Evaluation:
         )
 
 
-def evaluate_hand(player, open_cards):
-    all_cards = player.show_hand() + open_cards
-    ranks = [card.rank for card in all_cards]
-    suits = [card.suit for card in all_cards]
-
-    rank_count = {rank: ranks.count(rank) for rank in set(ranks)}
-    suit_count = {suit: suits.count(suit) for suit in set(suits)}
-
-    # Find flush suit if it exists
-    flush_suit = next((suit for suit, count in suit_count.items() if count >= 5), None)
-    is_flush = flush_suit is not None
-
-    # Get sorted ranks and handle flush
-    sorted_ranks = sorted(ranks, reverse=True)
-
-    # Check for straight flush first
-    if is_flush:
-        flush_cards = sorted(
-            [card.rank for card in all_cards if card.suit == flush_suit], reverse=True
-        )
-        straight_flush_high = check_straight(flush_cards)
-        if straight_flush_high:
-            return Evaluation(9, [straight_flush_high])  # Straight Flush
-
-    # Check for four of a kind
-    if 4 in rank_count.values():
-        quads = [r for r, count in rank_count.items() if count == 4][0]
-        kickers = [r for r in sorted_ranks if r != quads][:1]
-        return Evaluation(8, [quads], kickers)
-
-    # Check for full house
-    if sorted(rank_count.values()) == [2, 3]:
-        trips = [r for r, count in rank_count.items() if count == 3][0]
-        pair = [r for r, count in rank_count.items() if count == 2][0]
-        return Evaluation(7, [trips, pair])
-
-    # Check for flush
-    if is_flush:
-        flush_cards = sorted(
-            [card.rank for card in all_cards if card.suit == flush_suit], reverse=True
-        )[:5]
-        return Evaluation(6, flush_cards)
-
-    # Check for straight
-    straight_high = check_straight(sorted_ranks)
-    if straight_high:
-        return Evaluation(5, [straight_high])
-
-    # Check for three of a kind
-    if 3 in rank_count.values():
-        trips = [r for r, count in rank_count.items() if count == 3][0]
-        kickers = sorted([r for r in sorted_ranks if r != trips], reverse=True)[:2]
-        return Evaluation(4, [trips], kickers)
-
-    # Check for two pair
-    pairs = [r for r, count in rank_count.items() if count == 2]
-    if len(pairs) >= 2:
-        pairs.sort(reverse=True)
-        pairs = pairs[:2]  # Take highest two pairs
-        kickers = [r for r in sorted_ranks if r not in pairs][:1]
-        return Evaluation(3, pairs, kickers)
+_EVALUATIONS = {}  # strength -> Evaluation, filled by from_strength
+# evaluate_hand indexes these with SEVEN_CARD_TABLE, skipping the dict
+_SEVEN_CARD_EVALUATIONS = [Evaluation.from_strength(s) for s in SEVEN_CARD_STRENGTHS]
 
-    # Check for one pair
-    if pairs:
-        pair = pairs[0]
-        kickers = [r for r in sorted_ranks if r != pair][:3]
-        return Evaluation(2, [pair], kickers)
 
-    # High card
-    return Evaluation(1, [], sorted_ranks[:5])
+def evaluate_hand(player, open_cards):
+    """Compatibility wrapper: evaluate a player's Card objects plus the board."""
+    hole = player.show_hand()
+    if len(hole) == 2 and len(open_cards) == 5:
+        # Card.key is the card's SEVEN_CARD_KEYS entry, so this is
+        # hand_strength without building a list of card ints first
+        a, b = hole
+        c, d, e, f, g = open_cards
+        key = a.key + b.key + c.key + d.key + e.key + f.key + g.key
+        if FLUSH_SUIT[key & SUIT_MASK] < 0:
+            return _SEVEN_CARD_EVALUATIONS[SEVEN_CARD_TABLE[key >> SUIT_BITS]]
+    cards = hole + open_cards
+    return Evaluation.from_strength(hand_strength([card.code for card in cards]))
 
 
 def check_straight(ranks):
     """Helper function to check for straights."""
-    # Remove duplicates and sort
-    unique_ranks = sorted(set(ranks), reverse=True)
-
-    # Regular straight check
-    for i in range(len(unique_ranks) - 4):
-        if unique_ranks[i] - unique_ranks[i + 4] == 4:
-            return unique_ranks[i]
-
-    # Ace-low straight check (A,2,3,4,5)
-    if 14 in unique_ranks and {2, 3, 4, 5}.issubset(set(unique_ranks)):
-        return 5
-
-    return None
-
-
-###Tests
-
-# ranks = list(range(2, 15))  # 2-14 where 11-14 are J, Q, K, A
-# #suits = [1,2,3,4]
-# suits = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
-# cards = [Card(rank, suit) for rank in ranks for suit in suits]
-
-# game = Game(num_players=2, cards=cards)
-# game.start()
-# game.flop()
-# game.turn()
-# game.river()
-
-# for player in game.players:
-#     hand_rank = evaluate_hand(player, game.open_cards)
-#     print(f"Player {player.name} has a {hand_rank}")
+    mask = 0
+    for rank in ranks:
+        mask |= 1 << (rank - 2)
+    return STRAIGHT_HIGH[mask] or None
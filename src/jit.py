@@ -0,0 +1,205 @@
+# Optional compiled backend. When numba is importable, simulate_batch runs
+# deal -> evaluate -> tally for every sample in one nopython kernel,
+# parallel over samples; set POKER_MC_JIT=0 to keep the NumPy path anyway.
+# Without numba the kernel below is plain Python, far too slow for real
+# runs, and only the parity tests call it.
+#
+# The kernel deals from the same uniforms deal_batch draws, in the same
+# order, and evaluates with the same tables, so a seed gives identical
+# counts on either backend.
+import multiprocessing
+import os
+
+import numpy as np
+
+from src.eval_funcs import CLASS_SHIFT, FLUSH_TABLE, STRAIGHT_HIGH, TOP
+from src.eval_funcs import OMAHA_BOARD_TRIPLES, OMAHA_HOLE_PAIRS
+from src.eval_funcs import (
+    FOUR_OF_A_KIND,
+    FULL_HOUSE,
+    HIGH_CARD,
+    PAIR,
+    STRAIGHT,
+    THREE_OF_A_KIND,
+    TWO_PAIR,
+)
+
+try:
+    from numba import njit, prange
+except ImportError:
+    AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+else:
+    AVAILABLE = True
+
+ENABLED = AVAILABLE and os.environ.get("POKER_MC_JIT", "1") != "0"
+
+
+def mp_context():
+    """Context for worker process pools. numba's threading layers aren't
+    fork-safe once a parallel kernel has run in the process, so with numba
+    installed pools spawn fresh workers (None keeps the platform default)."""
+    return multiprocessing.get_context("spawn") if AVAILABLE else None
+
+
+_TOP = np.array(TOP, dtype=np.int64)  # (6, 8192)
+_STRAIGHT_HIGH = np.array(STRAIGHT_HIGH, dtype=np.int64)
+_FLUSH_TABLE = np.array(FLUSH_TABLE, dtype=np.int64)
+_HOLE_PAIRS = np.array(OMAHA_HOLE_PAIRS, dtype=np.int64)
+_BOARD_TRIPLES = np.array(OMAHA_BOARD_TRIPLES, dtype=np.int64)
+
+
+@njit(cache=True)
+def _high(mask, top):
+    # index of the highest set rank bit (TOP[1] packs it as rank + 2)
+    return top[1, mask] - 2
+
+
+@njit(cache=True)
+def _strength_from_masks(m1, m2, m3, m4, top, straight_high):
+    # eval_funcs.strength_from_masks over arrays
+    if m4:
+        quads = _high(m4, top)
+        return (
+            (FOUR_OF_A_KIND << CLASS_SHIFT)
+            | ((quads + 2) << 16)
+            | (top[1, m1 & ~(1 << quads)] << 12)
+        )
+    trips = -1
+    if m3:
+        trips = _high(m3, top)
+        rest = m2 & ~(1 << trips)
+        if rest:
+            return (
+                (FULL_HOUSE << CLASS_SHIFT)
+                | ((trips + 2) << 16)
+                | ((_high(rest, top) + 2) << 12)
+            )
+    high = straight_high[m1]
+    if high:
+        return (STRAIGHT << CLASS_SHIFT) | (high << 16)
+    if m3:
+        return (
+            (THREE_OF_A_KIND << CLASS_SHIFT)
+            | ((trips + 2) << 16)
+            | (top[2, m1 & ~(1 << trips)] << 8)
+        )
+    if m2 & (m2 - 1):
+        first = _high(m2, top)
+        second = _high(m2 ^ (1 << first), top)
+        return (
+            (TWO_PAIR << CLASS_SHIFT)
+            | ((first + 2) << 16)
+            | ((second + 2) << 12)
+            | (top[1, m1 & ~((1 << first) | (1 << second))] << 8)
+        )
+    if m2:
+        pair = _high(m2, top)
+        return (PAIR << CLASS_SHIFT) | ((pair + 2) << 16) | (top[3, m1 & ~m2] << 4)
+    return (HIGH_CARD << CLASS_SHIFT) | top[5, m1]
+
+
+@njit(cache=True)
+def strength(cards, top, straight_high, flush_table):
+    """hand_strength of a 5 to 7 card int array."""
+    rank_counts = np.zeros(13, dtype=np.int64)
+    suit_counts = np.zeros(4, dtype=np.int64)
+    suit_masks = np.zeros(4, dtype=np.int64)
+    for card in cards:
+        rank = card >> 2
+        suit = card & 3
+        rank_counts[rank] += 1
+        suit_counts[suit] += 1
+        suit_masks[suit] |= 1 << rank
+    for suit in range(4):
+        if suit_counts[suit] >= 5:
+            return flush_table[suit_masks[suit]]
+    m1 = m2 = m3 = m4 = 0
+    for rank in range(13):
+        count = rank_counts[rank]
+        bit = 1 << rank
+        if count >= 1:
+            m1 |= bit
+        if count >= 2:
+            m2 |= bit
+        if count >= 3:
+            m3 |= bit
+        if count >= 4:
+            m4 |= bit
+    return _strength_from_masks(m1, m2, m3, m4, top, straight_high)
+
+
+@njit(cache=True)
+def _player_strength(deal, seat, hand_size, board_at, tables):
+    top, straight_high, flush_table, hole_pairs, board_triples = tables
+    hole = deal[seat * hand_size : (seat + 1) * hand_size]
+    board = deal[board_at : board_at + 5]
+    if hand_size == 2:
+        cards = np.empty(7, dtype=np.int64)
+        cards[:2] = hole
+        cards[2:] = board
+        return strength(cards, top, straight_high, flush_table)
+    # Omaha: exactly 2 hole cards with 3 board cards
+    best = 0
+    cards = np.empty(5, dtype=np.int64)
+    for p in range(hole_pairs.shape[0]):
+        cards[0] = hole[hole_pairs[p, 0]]
+        cards[1] = hole[hole_pairs[p, 1]]
+        for t in range(board_triples.shape[0]):
+            for c in range(3):
+                cards[2 + c] = board[board_triples[t, c]]
+            value = strength(cards, top, straight_high, flush_table)
+            if value > best:
+                best = value
+    return best
+
+
+@njit(parallel=True, cache=True)
+def _kernel(slots, unknown, remaining, uniforms, players, hand_size, tables):
+    n = uniforms.shape[1]
+    winners = np.empty(n, dtype=np.int64)
+    board_at = players * hand_size
+    for i in prange(n):
+        # the partial Fisher-Yates of deal_batch, one row at a time
+        deal = slots.copy()
+        pool = remaining.copy()
+        for k in range(unknown.size):
+            j = k + int(uniforms[k, i] * (remaining.size - k))
+            picked = pool[j]
+            pool[j] = pool[k]
+            pool[k] = picked
+            deal[unknown[k]] = picked
+
+        best = -1
+        winner = -1
+        for seat in range(players):
+            value = _player_strength(deal, seat, hand_size, board_at, tables)
+            if value > best:
+                best = value
+                winner = seat
+            elif value == best:
+                winner = -1
+        winners[i] = winner
+    return winners
+
+
+def winners(slots, unknown, remaining, uniforms, players, hand_size):
+    """Winning seat (-1 for a split pot) of each deal, given deal_batch's
+    card slots, unknown positions, remaining deck and its (unknown, n)
+    uniforms."""
+    tables = (_TOP, _STRAIGHT_HIGH, _FLUSH_TABLE, _HOLE_PAIRS, _BOARD_TRIPLES)
+    return _kernel(
+        np.asarray(slots, dtype=np.int64),
+        np.asarray(unknown, dtype=np.int64),
+        np.asarray(remaining, dtype=np.int64),
+        uniforms,
+        players,
+        hand_size,
+        tables,
+    )
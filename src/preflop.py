@@ -0,0 +1,266 @@
+# Precomputed preflop hold'em equities.
+#
+# Build once (long-running, parallel):
+#     python -m src.preflop --workers 8
+# then every preflop query is an O(1) read from a memory-mapped file.
+#
+# File layout: raw little-endian uint16 fixed point (p * 65535), first the
+# heads-up block [hero hand, villain hand, (win, tie)], then the
+# vs-random block [hero hand, players - 2, (win, tie)]. Hands are indexed
+# in colex order of their two card ints (see hand_index). A small JSON
+# sidecar records how the table was built.
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+from pathlib import Path
+
+import numpy as np
+
+from src import jit
+from src.canonical import canonical_key
+from src.cards import decode_card, encode_cards
+from src.equity import build_result, exact_equity, run_equity
+
+NUM_HANDS = 1326
+MIN_PLAYERS, MAX_PLAYERS = 2, 6
+SCALE = 65535
+HEADS_UP_SHAPE = (NUM_HANDS, NUM_HANDS, 2)
+VS_RANDOM_SHAPE = (NUM_HANDS, MAX_PLAYERS - MIN_PLAYERS + 1, 2)
+_HEADS_UP_SIZE = NUM_HANDS * NUM_HANDS * 2
+
+DEFAULT_PATH = Path(
+    os.environ.get(
+        "POKER_MC_PREFLOP", Path.home() / ".cache" / "poker_mc" / "preflop.u16"
+    )
+)
+
+# HANDS[hand_index(cards)] == sorted card ints
+HANDS = sorted(combinations(range(52), 2), key=lambda hand: (hand[1], hand[0]))
+
+
+def hand_index(codes):
+    """Colex index (0..1325) of a two-card hand given as card ints."""
+    low, high = sorted(codes)
+    return high * (high - 1) // 2 + low
+
+
+def _state(*hands):
+    return {
+        "players": [
+            {
+                "name": f"Player{i + 1}",
+                "hand": None if hand is None else [decode_card(c) for c in hand],
+            }
+            for i, hand in enumerate(hands)
+        ],
+        "table": {"flop": None, "turn": None, "river": None},
+        "game_type": "texas",
+    }
+
+
+def _heads_up_job(args):
+    i, j, sims = args
+    state = _state(HANDS[i], HANDS[j])
+    if sims is None:
+        result = exact_equity(state)
+    else:
+        result = run_equity(state, sims, seed=i * NUM_HANDS + j, exact=False)
+    return result["win_prob"]["Player1"], result["win_prob"]["Tie"]
+
+
+def _vs_random_job(args):
+    i, players, sims = args
+    state = _state(HANDS[i], *[None] * (players - 1))
+    result = run_equity(state, sims, seed=i * MAX_PLAYERS + players, exact=False)
+    return result["win_prob"]["Player1"], result["win_prob"]["Tie"]
+
+
+def _classes(keys_of):
+    """Group items by canonical key; returns {key: [item, ...]}."""
+    classes = {}
+    for item, key in keys_of:
+        classes.setdefault(key, []).append(item)
+    return classes
+
+
+def _heads_up_classes(indices=range(NUM_HANDS)):
+    """Non-conflicting pairs (i, j), i < j, of the hands at the (sorted)
+    indices, grouped by the suit-isomorphism class of the matchup."""
+    pairs = [
+        (i, j) for i, j in combinations(indices, 2) if not set(HANDS[i]) & set(HANDS[j])
+    ]
+    return _classes(
+        (pair, canonical_key(_state(HANDS[pair[0]], HANDS[pair[1]]))) for pair in pairs
+    )
+
+
+def _store_heads_up(heads_up, members, win, tie):
+    """Give every matchup in a class its (win, tie), and each mirror image
+    (B vs A) the same numbers from the other side."""
+    for i, j in members:
+        heads_up[i, j] = win, tie
+        heads_up[j, i] = 1 - win - tie, tie
+
+
+def build_table(
+    path=DEFAULT_PATH, sims=None, multiway_sims=200_000, workers=1, progress=print
+):
+    """Compute and write the table.
+
+    Heads-up matchups are enumerated exactly over all C(48, 5) boards
+    unless `sims` asks for sampling. Only one representative per
+    suit-isomorphism class is computed, and (B vs A) is read off (A vs B).
+    Hand-vs-one-random is the exact average of the heads-up rows;
+    3-6 players are sampled with `multiway_sims` deals per hand class.
+    """
+    heads_up = np.zeros(HEADS_UP_SHAPE)
+    vs_random = np.zeros(VS_RANDOM_SHAPE)
+
+    matchups = _heads_up_classes()
+    progress(f"{len(matchups)} heads-up classes")
+    jobs = [(*members[0], sims) for members in matchups.values()]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=jit.mp_context()) as pool:
+        for done, (members, (win, tie)) in enumerate(
+            zip(matchups.values(), pool.map(_heads_up_job, jobs, chunksize=16)), 1
+        ):
+            _store_heads_up(heads_up, members, win, tie)
+            if done % 1000 == 0:
+                progress(f"heads-up {done}/{len(matchups)}")
+
+    # a uniformly random villain is one of the 1225 non-conflicting hands
+    vs_random[:, 0] = heads_up.sum(axis=1) / comb(50, 2)
+
+    hand_classes = _classes(
+        (i, canonical_key(_state(HANDS[i]))) for i in range(NUM_HANDS)
+    )
+    for players in range(MIN_PLAYERS + 1, MAX_PLAYERS + 1):
+        jobs = [
+            (members[0], players, multiway_sims) for members in hand_classes.values()
+        ]
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=jit.mp_context()
+        ) as pool:
+            for members, (win, tie) in zip(
+                hand_classes.values(), pool.map(_vs_random_job, jobs)
+            ):
+                vs_random[members, players - MIN_PLAYERS] = win, tie
+        progress(f"{players}-handed vs random done")
+
+    write_table(
+        path, heads_up, vs_random, {"sims": sims, "multiway_sims": multiway_sims}
+    )
+
+
+def write_table(path, heads_up, vs_random, meta):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = np.memmap(
+        path, dtype="<u2", mode="w+", shape=(_HEADS_UP_SIZE + vs_random.size,)
+    )
+    data[:_HEADS_UP_SIZE] = np.rint(heads_up.ravel() * SCALE)
+    data[_HEADS_UP_SIZE:] = np.rint(vs_random.ravel() * SCALE)
+    data.flush()
+    Path(f"{path}.json").write_text(json.dumps(meta))
+
+
+class PreflopTable:
+    """Read-only view of a built table; opening it maps the file, nothing is parsed."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        data = np.memmap(path, dtype="<u2", mode="r")
+        if data.size != _HEADS_UP_SIZE + np.prod(VS_RANDOM_SHAPE):
+            raise ValueError(f"{path} is not a preflop table")
+        self.heads_up_table = data[:_HEADS_UP_SIZE].reshape(HEADS_UP_SHAPE)
+        self.vs_random_table = data[_HEADS_UP_SIZE:].reshape(VS_RANDOM_SHAPE)
+        self.meta = json.loads(Path(f"{path}.json").read_text())
+
+    def heads_up(self, hand, villain):
+        """(win, tie) for hand vs villain, both lists of (rank, suit)."""
+        win, tie = self.heads_up_table[
+            hand_index(encode_cards(hand)), hand_index(encode_cards(villain))
+        ]
+        return win / SCALE, tie / SCALE
+
+    def vs_random(self, hand, players):
+        """(win, tie) for hand against players - 1 random hands."""
+        win, tie = self.vs_random_table[
+            hand_index(encode_cards(hand)), players - MIN_PLAYERS
+        ]
+        return win / SCALE, tie / SCALE
+
+    def lookup(self, state_dict):
+        """Answer a preflop hold'em state_dict from the table, or None if it
+        isn't a shape the table covers (board cards, Omaha, two or more
+        known hands multiway, ranges, ...)."""
+        table = state_dict["table"]
+        if state_dict["game_type"] != "texas" or any(
+            table.get(s) for s in ("flop", "turn", "river")
+        ):
+            return None
+        players = state_dict["players"]
+        if any(player.get("range") is not None for player in players):
+            # range_equity(table=...) answers these from the same table
+            return None
+        known = [i for i, player in enumerate(players) if player["hand"] is not None]
+        names = [player["name"] for player in players]
+
+        if len(players) == 2 and len(known) == 2:
+            if set(encode_cards(players[0]["hand"])) & set(
+                encode_cards(players[1]["hand"])
+            ):
+                return None
+            win, tie = self.heads_up(players[0]["hand"], players[1]["hand"])
+            win_prob = {names[0]: win, names[1]: 1 - win - tie}
+            sims = self.meta["sims"]
+        elif len(known) == 1 and MIN_PLAYERS <= len(players) <= MAX_PLAYERS:
+            hero = known[0]
+            win, tie = self.vs_random(players[hero]["hand"], len(players))
+            # the random opponents are interchangeable
+            other = (1 - win - tie) / (len(players) - 1)
+            win_prob = {
+                name: win if i == hero else other for i, name in enumerate(names)
+            }
+            # heads-up vs random is averaged from the heads-up block
+            sims = (
+                self.meta["sims"] if len(players) == 2 else self.meta["multiway_sims"]
+            )
+        else:
+            return None
+
+        win_prob["Tie"] = tie
+        exact = sims is None
+        sims = comb(48, 5) if exact else sims
+        # report as counts over the deals behind each table entry
+        outcomes = {name: p * sims for name, p in win_prob.items()}
+        result = build_result(outcomes, sims, exact=exact, seed=None)
+        result["stopped"] = "preflop table"
+        return result
+
+
+def load_table(path=DEFAULT_PATH):
+    """The PreflopTable at path, or None if it hasn't been built."""
+    if not Path(path).exists():
+        return None
+    return PreflopTable(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the preflop equity table.")
+    parser.add_argument("--out", default=DEFAULT_PATH)
+    parser.add_argument(
+        "--sims",
+        type=int,
+        default=None,
+        help="sample heads-up matchups instead of enumerating all boards",
+    )
+    parser.add_argument("--multiway-sims", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    build_table(args.out, args.sims, args.multiway_sims, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# Opt-in instrumentation. Nothing here runs unless asked for: Game's
+# methods are only wrapped with timers inside profile_games(), and the
+# batch path only times its stages when given a StageStats.
+#
+#     with profile_games() as stats:
+#         simulate_games(state_dict, 10_000)
+#     print(stats.report())
+import cProfile
+import io
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from src.classes import Game
+
+GAME_STAGES = ("__init__", "start", "flop", "turn", "river", "compute_winner")
+
+
+class StageStats:
+    """Cumulative call counts and seconds per named stage."""
+
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+
+    def add(self, stage, seconds, calls=1):
+        self.calls[stage] = self.calls.get(stage, 0) + calls
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def merge(self, other):
+        for stage, calls in other.calls.items():
+            self.add(stage, other.seconds[stage], calls)
+        return self
+
+    def as_dict(self):
+        """{stage: {"calls", "seconds", "mean_us", "share"}}, where share is
+        the stage's fraction of all recorded time."""
+        total = sum(self.seconds.values()) or 1.0
+        return {
+            stage: {
+                "calls": calls,
+                "seconds": self.seconds[stage],
+                "mean_us": self.seconds[stage] / calls * 1e6,
+                "share": self.seconds[stage] / total,
+            }
+            for stage, calls in self.calls.items()
+        }
+
+    def report(self):
+        lines = [
+            f"{'stage':16} {'calls':>10} {'seconds':>10} {'mean us':>10} {'share':>6}"
+        ]
+        for stage, row in self.as_dict().items():
+            lines.append(
+                f"{stage:16} {row['calls']:>10} {row['seconds']:>10.4f} "
+                f"{row['mean_us']:>10.2f} {row['share']:>6.1%}"
+            )
+        return "\n".join(lines)
+
+
+def _timed(method, stage, stats, sampled):
+    @wraps(method)
+    def wrapper(game, *args, **kwargs):
+        if not sampled(game):
+            return method(game, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(game, *args, **kwargs)
+        finally:
+            stats.add(stage, time.perf_counter() - started)
+
+    return wrapper
+
+
+@contextmanager
+def profile_games(stats=None, every=1):
+    """Time each Game stage (GAME_STAGES) for every game created inside
+    the block, accumulating into `stats` (a new StageStats by default,
+    yielded).
+
+    every=N times only every Nth game, which keeps the timer overhead
+    down on long runs; the reported calls are then the sampled ones.
+    Game is patched for the whole process, so don't profile from two
+    threads at once.
+    """
+    stats = stats if stats is not None else StageStats()
+    originals = {stage: Game.__dict__[stage] for stage in GAME_STAGES}
+    created = 0
+
+    original_init = originals["__init__"]
+
+    @wraps(original_init)
+    def init(game, *args, **kwargs):
+        nonlocal created
+        game._profiled = created % every == 0
+        created += 1
+        if not game._profiled:
+            return original_init(game, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return original_init(game, *args, **kwargs)
+        finally:
+            stats.add("__init__", time.perf_counter() - started)
+
+    def sampled(game):
+        return getattr(game, "_profiled", False)
+
+    Game.__init__ = init
+    for stage in GAME_STAGES[1:]:
+        setattr(Game, stage, _timed(originals[stage], stage, stats, sampled))
+    try:
+        yield stats
+    finally:
+        for stage, method in originals.items():
+            setattr(Game, stage, method)
+
+
+def run_cprofile(func, *args, path=None, top=25, **kwargs):
+    """Run func under cProfile. Writes the raw profile to `path` (for
+    snakeviz, pstats, ...) when given and returns the top `top`
+    functions by cumulative time as text, along with func's result."""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    if path:
+        profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+    return out.getvalue(), result
+
+
+@contextmanager
+def perf_trampoline():
+    """Let Linux `perf record` attribute samples to Python functions
+    (Python 3.12+; elsewhere a ValueError explains what's missing)."""
+    if not hasattr(sys, "activate_stack_trampoline"):
+        raise ValueError("perf support needs Python 3.12 or newer on Linux.")
+    sys.activate_stack_trampoline("perf")
+    try:
+        yield
+    finally:
+        sys.deactivate_stack_trampoline()
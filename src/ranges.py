@@ -0,0 +1,350 @@
+# Hold'em hand ranges and range-vs-range equity.
+#
+# A player in a state_dict may carry a "range" instead of an exact hand:
+#     {"name": "Villain", "hand": None, "range": "22+, ATs+, KQo, AhKh:0.5"}
+# Ranges are weighted lists of two-card combos. An exact hand is a range
+# of one combo and a random hand is the uniform range over all 1326, so
+# every player goes through the same engine.
+from itertools import combinations, product
+from math import comb
+
+import numpy as np
+
+from src.batch_eval import combination_index, evaluate_batch, known_slots, showdown
+from src.cards import RANK_CHARS, SUIT_CHARS, encode_cards
+from src.equity import build_result
+from src.preflop import HANDS, NUM_HANDS, SCALE, hand_index
+
+_SUIT_PAIRS = list(combinations(range(4), 2))
+
+
+def _rank(char):
+    if char not in RANK_CHARS:
+        raise ValueError(f"Unknown rank {char!r} in range.")
+    return RANK_CHARS.index(char)
+
+
+def _combos(high, low, kind):
+    """Card-int combos for one hand class; kind is "s", "o" or "" (both)."""
+    if high == low:
+        return [(high * 4 + a, high * 4 + b) for a, b in _SUIT_PAIRS]
+    suited = [(low * 4 + s, high * 4 + s) for s in range(4)]
+    offsuit = [
+        (low * 4 + a, high * 4 + b) for a in range(4) for b in range(4) if a != b
+    ]
+    return {"s": suited, "o": offsuit, "": suited + offsuit}[kind]
+
+
+def _parse_token(token):
+    """Combos named by one range token (without its weight)."""
+    if len(token) == 4 and token[1] in SUIT_CHARS and token[3] in SUIT_CHARS:
+        cards = sorted(
+            _rank(token[i]) * 4 + SUIT_CHARS.index(token[i + 1]) for i in (0, 2)
+        )
+        if cards[0] == cards[1]:
+            raise ValueError(f"{token!r} uses the same card twice.")
+        return [tuple(cards)]
+
+    if "-" in token:  # "55-99", "A2s-A5s"
+        ends = token.split("-")
+        if len(ends) != 2 or any(
+            len(end) not in (2, 3) or end[2:] not in ("", "s", "o") for end in ends
+        ):
+            raise ValueError(f"Can't parse range token {token!r}.")
+        first, last = ends
+        high, kind = _rank(first[0]), first[2:]
+        lows = sorted((_rank(first[1]), _rank(last[1])))
+        if first[0] == first[1] and last[0] == last[1]:  # pairs move both ranks
+            return [c for r in range(lows[0], lows[1] + 1) for c in _combos(r, r, "")]
+        if first[0] != last[0] or first[2:] != last[2:]:
+            raise ValueError(f"Range {token!r} must vary only the second rank.")
+        return [
+            c for low in range(lows[0], lows[1] + 1) for c in _combos(high, low, kind)
+        ]
+
+    plus = token.endswith("+")
+    token = token.rstrip("+")
+    if len(token) not in (2, 3) or token[2:] not in ("", "s", "o"):
+        raise ValueError(f"Can't parse range token {token!r}.")
+    high, low, kind = _rank(token[0]), _rank(token[1]), token[2:]
+    if high < low:
+        high, low = low, high
+    if high == low:
+        if kind:
+            raise ValueError(f"Pairs can't be suited or offsuit: {token!r}.")
+        pairs = range(high, 13) if plus else [high]
+        return [c for r in pairs for c in _combos(r, r, "")]
+    kickers = range(low, high) if plus else [low]
+    return [c for kicker in kickers for c in _combos(high, kicker, kind)]
+
+
+def parse_range(text):
+    """Parse range notation into {(low card int, high card int): weight}.
+
+    Tokens are comma separated: "QQ", "22+", "55-99", "AKs", "ATs+",
+    "A2s-A5s", "KQo", "KQ" (suited and offsuit) or exact combos like
+    "AhKh". A ":weight" suffix (e.g. "QQ:0.5") weights a token; later
+    tokens override earlier ones.
+    """
+    weights = {}
+    for token in text.replace(" ", "").split(","):
+        if not token:
+            continue
+        token, _, weight = token.partition(":")
+        weight = float(weight) if weight else 1.0
+        for combo in _parse_token(token):
+            weights[combo] = weight
+    return weights
+
+
+def range_from_matrix(matrix):
+    """Weights from a 13x13 grid in the usual layout: rows and columns run
+    A down to 2, pairs on the diagonal, suited hands above it and offsuit
+    hands below it."""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.shape != (13, 13):
+        raise ValueError("A range matrix must be 13x13.")
+    weights = {}
+    for i, j in product(range(13), repeat=2):
+        if matrix[i, j] > 0:
+            high, low = 12 - min(i, j), 12 - max(i, j)
+            kind = "" if i == j else "s" if i < j else "o"
+            for combo in _combos(high, low, kind):
+                weights[combo] = matrix[i, j]
+    return weights
+
+
+def to_weights(spec):
+    """Normalise a range given as text, {token: weight} or a 13x13 matrix."""
+    if isinstance(spec, str):
+        return parse_range(spec)
+    if isinstance(spec, dict):
+        weights = {}
+        for token, weight in spec.items():
+            for combo in _parse_token(token):
+                weights[combo] = float(weight)
+        return weights
+    return range_from_matrix(spec)
+
+
+ALL_COMBOS = np.array(list(combinations(range(52), 2)), dtype=np.int64)
+
+
+def _mask(cards):
+    return np.bitwise_or.reduce(np.left_shift(1, cards), axis=-1)
+
+
+def _player_combos(player, dead_mask):
+    """(combos (n, 2), weights (n,)) for one player, with combos that use a
+    dead card removed."""
+    if player.get("range") is not None:
+        weights = to_weights(player["range"])
+        combos = np.array(list(weights), dtype=np.int64).reshape(-1, 2)
+        weights = np.array(list(weights.values()), dtype=np.float64)
+    elif player["hand"] is not None:
+        combos = np.array([encode_cards(player["hand"])], dtype=np.int64)
+        weights = np.ones(1)
+    else:
+        combos, weights = ALL_COMBOS, np.ones(len(ALL_COMBOS))
+    live = ((_mask(combos) & dead_mask) == 0) & (weights > 0)
+    if not live.any():
+        raise ValueError(
+            f"{player['name']}'s range is empty after removing dead cards."
+        )
+    return combos[live], weights[live]
+
+
+def _table_equity(names, ranges, table):
+    """Preflop heads-up straight from the precomputed table: a weighted sum
+    over every non-conflicting combo pair."""
+    vectors = []
+    for combos, weights in ranges:
+        vector = np.zeros(NUM_HANDS)
+        vector[[hand_index(combo) for combo in combos.tolist()]] = weights
+        vectors.append(vector)
+
+    masks = _mask(np.array(HANDS, dtype=np.int64))
+    pair_weight = np.outer(*vectors) * ((masks[:, None] & masks[None, :]) == 0)
+    total = float(pair_weight.sum())
+    win = float((pair_weight * table.heads_up_table[:, :, 0]).sum()) / SCALE
+    tie = float((pair_weight * table.heads_up_table[:, :, 1]).sum()) / SCALE
+    if total == 0:
+        raise ValueError("The ranges leave no deal without a shared card.")
+    # report as counts over the deals behind each table entry
+    exact = table.meta["sims"] is None
+    sims = comb(48, 5) if exact else table.meta["sims"]
+    shares = {names[0]: win, names[1]: total - win - tie, "Tie": tie}
+    outcomes = {name: share / total * sims for name, share in shares.items()}
+    return build_result(outcomes, sims, exact=exact, seed=None)
+
+
+def _exact_equity(names, ranges, slots):
+    """Weighted enumeration of every (combo per player, board) pairing.
+
+    Each player's strength is evaluated once per (combo, board) and shared
+    by every pairing that uses it, instead of once per pairing.
+    """
+    known_board = slots[-5:][slots[-5:] >= 0]
+    dead = slots[slots >= 0]
+    remaining = np.setdiff1d(np.arange(52), dead)
+    fills = remaining[combination_index(remaining.size, 5 - known_board.size)]
+    boards = np.concatenate(
+        [np.broadcast_to(known_board, (len(fills), known_board.size)), fills], axis=1
+    )
+    board_masks = _mask(fills) if fills.shape[1] else np.zeros(len(fills), np.int64)
+
+    strengths = []
+    for combos, _ in ranges:
+        cards = np.concatenate(
+            [
+                np.broadcast_to(combos[:, None, :], (len(combos), len(boards), 2)),
+                np.broadcast_to(boards[None, :, :], (len(combos), len(boards), 5)),
+            ],
+            axis=2,
+        )
+        # pairs sharing a card are never looked up; leave them at 0
+        live = (_mask(combos)[:, None] & board_masks[None, :]) == 0
+        player_strengths = np.zeros(live.shape, dtype=np.int64)
+        player_strengths[live] = evaluate_batch(cards[live])
+        strengths.append(player_strengths)
+
+    # every combination of one combo per player, without shared cards
+    grid = np.stack(
+        np.meshgrid(*[np.arange(len(combos)) for combos, _ in ranges], indexing="ij"),
+        axis=-1,
+    ).reshape(-1, len(ranges))
+    masks = np.stack(
+        [_mask(combos)[grid[:, p]] for p, (combos, _) in enumerate(ranges)], axis=1
+    )
+    used = np.zeros(len(grid), dtype=np.int64)
+    valid = np.ones(len(grid), dtype=bool)
+    for p in range(len(ranges)):
+        valid &= (used & masks[:, p]) == 0
+        used |= masks[:, p]
+    grid, used = grid[valid], used[valid]
+    weights = np.prod([ranges[p][1][grid[:, p]] for p in range(len(ranges))], axis=0)
+
+    wins = np.zeros(len(ranges))
+    tie = total = 0.0
+    deals = 0
+    chunk = max(1, 2_000_000 // (len(boards) * len(ranges)))
+    for start in range(0, len(grid), chunk):
+        rows = grid[start : start + chunk]
+        live = (board_masks[None, :] & used[start : start + chunk, None]) == 0
+        row_strengths = np.stack(
+            [strengths[p][rows[:, p]] for p in range(len(ranges))], axis=2
+        )  # (rows, boards, players)
+        tied = row_strengths == row_strengths.max(axis=2, keepdims=True)
+        solo = (tied.sum(axis=2) == 1) & live
+        split = (tied.sum(axis=2) > 1) & live
+        weight = weights[start : start + chunk, None]
+        wins += (weight[:, :, None] * (tied & solo[:, :, None])).sum(axis=(0, 1))
+        tie += float((weight * split).sum())
+        total += float((weight * live).sum())
+        deals += int(live.sum())
+
+    if total == 0:
+        raise ValueError("The ranges leave no deal without a shared card.")
+    outcomes = {name: float(w) for name, w in zip(names, wins)}
+    outcomes["Tie"] = tie
+    result = build_result(outcomes, total, exact=True, seed=None)
+    result["sims"] = deals
+    return result
+
+
+def _sample_equity(names, ranges, slots, sims, rng, batch_size):
+    """Monte Carlo: draw one combo per player by weight, reject draws that
+    share a card, then deal the rest of the board around the dead cards."""
+    board_slots = slots[-5:]
+    unknown = np.flatnonzero(board_slots < 0)
+    known_mask = int(_mask(slots[slots >= 0])) if (slots >= 0).any() else 0
+    probabilities = [weights / weights.sum() for _, weights in ranges]
+    combo_masks = [_mask(combos) for combos, _ in ranges]
+
+    wins = np.zeros(len(names), dtype=np.int64)
+    ties = done = 0
+    while done < sims:
+        picks = [rng.choice(len(p), size=batch_size, p=p) for p in probabilities]
+        used = np.full(batch_size, known_mask, dtype=np.int64)
+        valid = np.ones(batch_size, dtype=bool)
+        for pick, masks in zip(picks, combo_masks):
+            valid &= (used & masks[pick]) == 0
+            used |= masks[pick]
+        if not valid.any():
+            raise ValueError("The ranges leave no deal without a shared card.")
+        valid[np.flatnonzero(valid)[sims - done :]] = False
+        hole = np.stack(
+            [combos[pick[valid]] for (combos, _), pick in zip(ranges, picks)], axis=1
+        )
+        used = used[valid]
+        m = len(hole)
+
+        board = np.broadcast_to(board_slots, (m, 5)).copy()
+        if unknown.size:
+            # random sort keys with each row's dead cards pushed to the end
+            keys = rng.random((m, 52))
+            keys[(used[:, None] >> np.arange(52)) & 1 == 1] = 2.0
+            board[:, unknown] = np.argpartition(keys, unknown.size, axis=1)[
+                :, : unknown.size
+            ]
+
+        winner = showdown(hole, board)["winner"]
+        wins += np.bincount(winner[winner >= 0], minlength=len(names))
+        ties += int((winner < 0).sum())
+        done += m
+
+    outcomes = {name: int(count) for name, count in zip(names, wins)}
+    outcomes["Tie"] = ties
+    return outcomes, done
+
+
+def range_equity(
+    state_dict, sims=100_000, seed=None, exact=None, table=None, batch_size=50_000
+):
+    """Equity of a hold'em state_dict whose players may hold ranges.
+
+    Heads-up preflop spots are answered from `table` (a preflop.PreflopTable)
+    when one is given, so even 169x169 range vs range is a single weighted
+    sum. Otherwise every pairing is enumerated when there are no more of
+    them than `sims` (or exact=True), and sampled when there are.
+    """
+    if state_dict["game_type"] != "texas":
+        raise ValueError("Ranges are only supported for Texas Hold'em.")
+    bare = {
+        **state_dict,
+        "players": [
+            {
+                "name": player["name"],
+                "hand": None if player.get("range") is not None else player["hand"],
+            }
+            for player in state_dict["players"]
+        ],
+    }
+    slots, _ = known_slots(bare)
+    board = slots[-5:]
+    names = [player["name"] for player in state_dict["players"]]
+    dead_mask = int(_mask(board[board >= 0])) if (board >= 0).any() else 0
+    ranges = [_player_combos(player, dead_mask) for player in state_dict["players"]]
+
+    if (
+        table is not None
+        and len(names) == 2
+        and (board < 0).all()
+        and exact is not False
+    ):
+        return _table_equity(names, ranges, table)
+
+    # slots of the enumeration: board cards only, hands come from the ranges
+    board_only = np.concatenate([np.full(2 * len(names), -1), board])
+    pairings = np.prod([float(len(combos)) for combos, _ in ranges])
+    runouts = comb(
+        52 - int((board >= 0).sum()) - 2 * len(names), int((board < 0).sum())
+    )
+    if exact or (exact is None and pairings * runouts <= sims):
+        return _exact_equity(names, ranges, board_only)
+
+    seed_seq = np.random.SeedSequence(seed)
+    outcomes, done = _sample_equity(
+        names, ranges, board_only, sims, np.random.default_rng(seed_seq), batch_size
+    )
+    return build_result(outcomes, done, exact=False, seed=seed_seq.entropy)
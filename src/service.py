@@ -0,0 +1,199 @@
+# Local JSON equity service, so every session at the table shares one set
+# of workers and one cache instead of each recomputing on its own:
+#     python -m src.service --port 8600 --workers 4
+#     POST /equity  {"state": state_dict, "target_se": 0.005, "time_budget": 5}
+#     GET  /stats
+# Requests for the same (or a suit-isomorphic) spot that arrive while it
+# is being computed wait on that one computation instead of starting
+# their own. Only the standard library is used for HTTP.
+import argparse
+import asyncio
+import json
+import os
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from src import jit
+from src.batch_eval import simulate_batch
+from src.cache import DEFAULT_PATH, EquityCache, from_seats, to_seats
+from src.canonical import canonical_key
+from src.equity import run_adaptive
+
+DEFAULT_PARAMS = {"target_se": 0.005, "time_budget": 5.0}
+ALLOWED_PARAMS = {"target_se", "time_budget", "max_sims", "seed"}
+MAX_BODY = 1 << 20
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+_WARM_UP_STATE = {
+    "players": [
+        {"name": "Sam", "hand": [(14, "Hearts"), (13, "Hearts")]},
+        {"name": "Arch", "hand": None},
+    ],
+    "table": {"flop": None, "turn": None, "river": None},
+    "game_type": "texas",
+}
+
+
+def _warm_up():
+    # run once in each worker as it starts, so the first real request
+    # doesn't pay for imports, lookup tables and NumPy's first calls
+    simulate_batch(_WARM_UP_STATE, 100)
+
+
+class EquityService:
+    """Coalescing, caching front for run_adaptive on a warm process pool."""
+
+    def __init__(self, workers=1, cache=None):
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_warm_up, mp_context=jit.mp_context()
+        )
+        # spawn (and so warm up) every worker now rather than on the first
+        # requests
+        for future in [self.pool.submit(os.getpid) for _ in range(workers)]:
+            future.result()
+        self.cache = cache
+        self.in_flight = {}  # key -> task resolving to a seat-ordered result
+        self.stats = {"requests": 0, "computed": 0, "coalesced": 0, "cached": 0}
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    async def equity(self, state_dict, params):
+        unknown = set(params) - ALLOWED_PARAMS
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}.")
+        params = {**DEFAULT_PARAMS, **params}
+        key_params = {"compute": "run_adaptive", **params}
+        names = [player["name"] for player in state_dict["players"]]
+        self.stats["requests"] += 1
+
+        if self.cache is not None:
+            result = self.cache.get(state_dict, key_params)
+            if result is not None:
+                self.stats["cached"] += 1
+                return result
+
+        key = canonical_key(state_dict) + json.dumps(key_params, sort_keys=True)
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._compute(key, state_dict, params, key_params)
+            )
+            self.in_flight[key] = task
+        else:
+            self.stats["coalesced"] += 1
+        # shield: one client going away mustn't cancel the others' result
+        return from_seats(await asyncio.shield(task), names)
+
+    async def _compute(self, key, state_dict, params, key_params):
+        loop = asyncio.get_running_loop()
+        names = [player["name"] for player in state_dict["players"]]
+        try:
+            self.stats["computed"] += 1
+            result = await loop.run_in_executor(
+                self.pool, partial(run_adaptive, state_dict, **params)
+            )
+            if self.cache is not None:
+                self.cache.put(state_dict, key_params, result)
+            return to_seats(result, names)
+        finally:
+            del self.in_flight[key]
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                status, body = await self._respond(reader)
+            except (ValueError, KeyError, TypeError) as err:
+                status, body = 400, {"error": str(err)}
+            except asyncio.IncompleteReadError:
+                status, body = 400, {"error": "Request ended early."}
+            except Exception as err:  # a bug, not the client's fault
+                status, body = 500, {"error": f"{type(err).__name__}: {err}"}
+            payload = json.dumps(body).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass  # the client went away; nobody to answer
+        finally:
+            writer.close()
+
+    async def _respond(self, reader):
+        request_line = (await reader.readline()).decode().split()
+        if len(request_line) != 3:
+            raise ValueError("Malformed request line.")
+        method, path, _ = request_line
+        headers = {}
+        while (line := (await reader.readline()).decode().strip()) != "":
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if path == "/stats" and method == "GET":
+            return 200, {**self.stats, "in_flight": len(self.in_flight)}
+        if path != "/equity":
+            return 404, {"error": f"No such endpoint {path}."}
+        if method != "POST":
+            return 405, {"error": "Use POST."}
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY:
+            raise ValueError("Request body too large.")
+        request = json.loads(await reader.readexactly(length))
+        if not isinstance(request, dict) or not isinstance(request.get("state"), dict):
+            raise ValueError('The body must be a JSON object with a "state" object.')
+        state = request.pop("state")
+        return 200, await self.equity(state, request)
+
+
+def request_equity(url, state_dict, timeout=60, **params):
+    """Blocking client for a running service: the result dict for a
+    state_dict, computed with run_adaptive(**params)."""
+    data = json.dumps({"state": state_dict, **params}).encode()
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/equity",
+        data=data,
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as err:
+        if err.code == 400:
+            raise ValueError(json.loads(err.read())["error"]) from None
+        raise
+
+
+async def serve(host="127.0.0.1", port=8600, workers=1, cache_path=DEFAULT_PATH):
+    service = EquityService(workers, EquityCache(cache_path) if cache_path else None)
+    server = await asyncio.start_server(service.handle, host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve equities over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache", default=DEFAULT_PATH)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.workers, args.cache))
+
+
+if __name__ == "__main__":
+    main()
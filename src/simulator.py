@@ -1,5 +1,80 @@
+import json
+import os
+
 import streamlit as st
-from classes import Card, Deck, Player, Game, Table
+from src.batch_eval import known_slots
+from src.cache import EquityCache
+from src.equity import stream_equity
+from src.preflop import load_table
+from src.service import request_equity
+
+# set to e.g. http://127.0.0.1:8600 to share one `python -m src.service`
+# between every session instead of simulating in this process
+SERVICE_URL = os.environ.get("POKER_MC_SERVICE")
+
+
+@st.cache_resource
+def equity_cache():
+    # one SQLite-backed cache for every session served by this process
+    return EquityCache()
+
+
+@st.cache_resource
+def preflop_table():
+    # memory-mapped once per process; None until `python -m src.preflop` has run
+    return load_table()
+
+
+def _params(target_se):
+    return {"compute": "run_adaptive", "target_se": target_se, "time_budget": 5.0}
+
+
+@st.cache_data(max_entries=256, ttl=3600, show_spinner=False)
+def stored_equity(state, target_se):
+    """Finished result for a validated state_dict from the preflop table,
+    the service or the SQLite cache, memoized per process (shared by
+    sessions). Raises LookupError, which memoizes nothing, when none of
+    them has it yet."""
+    result = preflop_table() and preflop_table().lookup(state)
+    if result is None and SERVICE_URL:
+        result = request_equity(
+            SERVICE_URL, state, target_se=target_se, time_budget=5.0
+        )
+    if result is None:
+        result = equity_cache().get(state, _params(target_se))
+    if result is None:
+        raise LookupError("no stored result")
+    return result
+
+
+def compute_equity(state, target_se, fresh=False):
+    """Stored equity of a validated state_dict, or a live simulation with
+    progress updates when there is none or `fresh` is set."""
+    if not fresh:
+        try:
+            return stored_equity(state, target_se)
+        except LookupError:
+            pass
+    # changing any input reruns the script, which abandons the generator
+    # and so cancels the run (and nothing gets stored)
+    status = st.empty()
+    chart = st.empty()
+    history = []
+    for result in stream_equity(
+        state, target_se=target_se, time_budget=5.0, interval=0.2
+    ):
+        if result["stopped"] is None:
+            history.append(result["win_prob"])
+            status.write(
+                "{} simulations so far, largest standard error {:.4f}".format(
+                    result["sims"], max(result["std_error"].values())
+                )
+            )
+            chart.line_chart(history)
+    status.empty()
+    chart.empty()
+    equity_cache().put(state, _params(target_se), result)
+    return result
 
 
 st.title("Poker Equity Calculator")
@@ -14,9 +89,6 @@ if "state_dict" not in st.session_state:
 
 init_players = [{"name": f"Player{i+1}", "hand": None} for i in range(num_players)]
 
-outcomes = {f"Player{i+1}": 0 for i in range(num_players)}
-outcomes["Tie"] = 0  # Add tie possibility
-
 
 if use_omaha:
     custom_state_dict = {
@@ -142,27 +214,41 @@ if st.checkbox("Add River Card?"):
     custom_state_dict["table"]["river"] = [card7]
 
 
-# FIXME: add validation to ensure no duplicate cards
 st.session_state.state_dict = custom_state_dict
 
 
-sims = 10_000
-for _ in range(sims):
-    game = Game(num_players=2, state_dict=st.session_state.state_dict, verbose=False)
-    game.start()
-    game.flop()
-    game.turn()
-    game.river()
-    winner = game.compute_winner()
-    # print(f"Winner: {winner}")
-    outcomes[winner] += 1
-
-# print(f"Final outcomes after {sims} games:")
-# for player, wins in outcomes.items():
-#     print(f"{player}: {wins} wins")
-
-win_prob = {player: wins / sims for player, wins in outcomes.items()}
+target_se = st.select_slider(
+    "Target standard error", options=[0.02, 0.01, 0.005, 0.0025, 0.001], value=0.005
+)
+state = st.session_state.state_dict
+try:
+    known_slots(state)  # duplicate cards in the inputs
+except ValueError as err:
+    st.error(str(err))
+    st.stop()
+
+# Unchanged inputs reuse this session's last result without touching any
+# cache, so reruns from unrelated widgets cost nothing; "Run again"
+# simulates the same spot afresh on the rerun its click triggers.
+fresh = st.button("Run again")
+inputs = (json.dumps(state, sort_keys=True), target_se)
+if fresh or st.session_state.get("inputs") != inputs:
+    st.session_state.result = compute_equity(state, target_se, fresh)
+    st.session_state.inputs = inputs
+result = st.session_state.result
+
+win_prob = result["win_prob"]
 print("Win probabilities:")
 print(win_prob)
-st.write("Win probabilities after {} simulations:".format(sims))
+if result["exact"]:
+    st.write("Exact win probabilities over all {} runouts:".format(result["sims"]))
+else:
+    st.write(
+        "Win probabilities after {} simulations (stopped on {}):".format(
+            result["sims"], result["stopped"]
+        )
+    )
 st.write(win_prob)
+if not result["exact"]:
+    st.write("95% confidence intervals:")
+    st.write(result["ci"])
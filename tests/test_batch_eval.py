@@ -0,0 +1,233 @@
+import numpy as np
+import pytest
+import random
+from src.batch_eval import (
+    count_deals,
+    deal_batch,
+    enumerate_deals,
+    evaluate_batch,
+    new_breakdown,
+    player_strengths,
+    showdown,
+    simulate_batch,
+)
+from src.cards import encode_cards
+from src.eval_funcs import (
+    FLUSH,
+    FOUR_OF_A_KIND,
+    FULL_HOUSE,
+    THREE_OF_A_KIND,
+    hand_strength,
+)
+
+
+@pytest.mark.parametrize("num_cards", [5, 6, 7])
+def test_batch_matches_scalar_evaluator(num_cards):
+    """Vectorised strengths are identical to hand_strength"""
+    rng = random.Random(num_cards)
+    cards = np.array([rng.sample(range(52), num_cards) for _ in range(5000)])
+    expected = [hand_strength(list(row)) for row in cards]
+    assert evaluate_batch(cards).tolist() == expected
+
+
+@pytest.mark.parametrize("board_size", [3, 4, 5])
+def test_texas_player_strengths_share_the_board(board_size):
+    """The shared-board Hold'em path matches evaluating each 7 cards"""
+    rng = random.Random(board_size)
+    deals = np.array([rng.sample(range(52), board_size + 12) for _ in range(3000)])
+    board, hole = deals[:, :board_size], deals[:, board_size:].reshape(-1, 6, 2)
+    expected = [
+        [hand_strength(list(hand) + list(cards)) for hand in hands]
+        for hands, cards in zip(hole, board)
+    ]
+    assert player_strengths(hole, board).tolist() == expected
+
+
+def test_showdown_winner_and_tie():
+    """Row 0 has a clear winner, row 1 is a board-played split"""
+    hole = np.array(
+        [
+            [
+                encode_cards([(14, "Hearts"), (14, "Clubs")]),
+                encode_cards([(2, "Spades"), (7, "Clubs")]),
+            ],
+            [
+                encode_cards([(2, "Hearts"), (3, "Clubs")]),
+                encode_cards([(2, "Spades"), (4, "Clubs")]),
+            ],
+        ]
+    )
+    board = np.array(
+        [
+            encode_cards(
+                [
+                    (14, "Spades"),
+                    (9, "Hearts"),
+                    (5, "Diamonds"),
+                    (12, "Clubs"),
+                    (8, "Spades"),
+                ]
+            ),
+            encode_cards(
+                [
+                    (10, "Spades"),
+                    (11, "Hearts"),
+                    (12, "Diamonds"),
+                    (13, "Clubs"),
+                    (14, "Spades"),
+                ]
+            ),
+        ]
+    )
+    result = showdown(hole, board)
+    assert result["winner"].tolist() == [0, -1]
+    assert result["tied"][1].all()
+    assert result["class_counts"][0, 4] == 1  # trip aces
+
+
+def test_deal_batch_respects_known_cards():
+    """Known cards stay put and no card is dealt twice in a row"""
+    state = {
+        "players": [
+            {"name": "Sam", "hand": [(14, "Hearts"), (13, "Hearts")]},
+            {"name": "Arch", "hand": None},
+            {"name": "Bo", "hand": None},
+        ],
+        "table": {
+            "flop": [(2, "Clubs"), (3, "Clubs"), (4, "Clubs")],
+            "turn": None,
+            "river": None,
+        },
+        "game_type": "texas",
+    }
+    hole, board = deal_batch(state, 1000, np.random.default_rng(0))
+    assert (hole[:, 0] == encode_cards([(14, "Hearts"), (13, "Hearts")])).all()
+    assert (board[:, :3] == encode_cards(state["table"]["flop"])).all()
+    rows = np.concatenate([hole.reshape(1000, -1), board], axis=1)
+    assert all(len(set(row)) == row.size for row in rows)
+
+
+def test_enumerate_deals_in_chunks():
+    """Every completion exactly once, one bounded chunk at a time"""
+    state = {
+        "players": [
+            {"name": "Sam", "hand": [(14, "Hearts"), (13, "Hearts")]},
+            {"name": "Arch", "hand": None},
+        ],
+        "table": {
+            "flop": [(2, "Clubs"), (3, "Clubs"), (4, "Clubs")],
+            "turn": [(9, "Spades")],
+            "river": None,
+        },
+        "game_type": "texas",
+    }
+    seen = set()
+    for hole, board in enumerate_deals(state, chunk_size=1000):
+        assert len(board) <= 1000
+        assert (hole[:, 0] == encode_cards(state["players"][0]["hand"])).all()
+        assert (board[:, :3] == encode_cards(state["table"]["flop"])).all()
+        for villain, river in zip(hole[:, 1].tolist(), board[:, 4].tolist()):
+            assert river not in villain
+            seen.add((tuple(villain), river))
+    assert len(seen) == count_deals(state) == 1035 * 44
+
+
+def test_simulate_batch_known_runout():
+    """A fully specified hand always produces the same winner"""
+    state = {
+        "players": [
+            {"name": "Sam", "hand": [(14, "Hearts"), (13, "Hearts")]},
+            {"name": "Arch", "hand": [(2, "Diamonds"), (2, "Clubs")]},
+        ],
+        "table": {
+            "flop": [(12, "Hearts"), (11, "Hearts"), (10, "Hearts")],
+            "turn": [(5, "Diamonds")],
+            "river": [(2, "Spades")],
+        },
+        "game_type": "texas",
+    }
+    assert simulate_batch(state, 100) == {"Sam": 100, "Arch": 0, "Tie": 0}
+
+
+def test_simulate_batch_rejects_duplicate_cards():
+    state = {
+        "players": [
+            {"name": "Sam", "hand": [(14, "Hearts"), (13, "Hearts")]},
+            {"name": "Arch", "hand": [(14, "Hearts"), (2, "Clubs")]},
+        ],
+        "table": {"flop": None, "turn": None, "river": None},
+        "game_type": "texas",
+    }
+    with pytest.raises(ValueError):
+        simulate_batch(state, 10)
+
+
+@pytest.mark.parametrize(
+    "hand, message",
+    [
+        ([(15, "Hearts"), (13, "Hearts")], "Invalid card"),
+        ([(1, "Hearts"), (13, "Hearts")], "Invalid card"),
+        ([(14, "Hearts"), (13, "Hats")], "Invalid card"),
+        ([(14, "Hearts")], "needs 2 cards"),
+        ([(14, "Hearts"), (13, "Hearts"), (12, "Hearts")], "needs 2 cards"),
+    ],
+)
+def test_simulate_batch_rejects_bad_hands(hand, message):
+    state = {
+        "players": [
+            {"name": "Sam", "hand": hand},
+            {"name": "Arch", "hand": None},
+        ],
+        "table": {"flop": None, "turn": None, "river": None},
+        "game_type": "texas",
+    }
+    with pytest.raises(ValueError, match=message):
+        simulate_batch(state, 10)
+
+
+def test_simulate_batch_rejects_bad_board():
+    state = {
+        "players": [
+            {"name": "Sam", "hand": [(14, "Hearts"), (13, "Hearts")]},
+            {"name": "Arch", "hand": None},
+        ],
+        "table": {"flop": [(2, "Clubs"), (3, "Clubs")], "turn": None, "river": None},
+        "game_type": "texas",
+    }
+    with pytest.raises(ValueError, match="the flop needs 3 cards"):
+        simulate_batch(state, 10)
+    state["table"]["flop"] = [(2, "Clubs"), (3, "Clubs"), (0, "Clubs")]
+    with pytest.raises(ValueError, match="Invalid card"):
+        simulate_batch(state, 10)
+
+
+def test_breakdown_counts_classes_and_outs():
+    """Arch's K♠ K♣ needs the last king on the river against A♠ A♣"""
+    state = {
+        "players": [
+            {"name": "Sam", "hand": [(14, "Spades"), (14, "Clubs")]},
+            {"name": "Arch", "hand": [(13, "Spades"), (13, "Clubs")]},
+        ],
+        "table": {
+            "flop": [(14, "Hearts"), (13, "Diamonds"), (2, "Clubs")],
+            "turn": [(7, "Spades")],
+            "river": None,
+        },
+        "game_type": "texas",
+    }
+    breakdown = new_breakdown(2)
+    outcomes = simulate_batch(
+        state, 2000, np.random.default_rng(1), breakdown=breakdown
+    )
+    assert breakdown["class_counts"].sum(axis=1).tolist() == [2000, 2000]
+    # Sam ends with trips, a full house when the river pairs the board,
+    # or quads on the last ace
+    sam = breakdown["class_counts"][0]
+    assert sam[THREE_OF_A_KIND] + sam[FULL_HOUSE] + sam[FOUR_OF_A_KIND] == 2000
+    assert sam[FLUSH] == 0
+
+    # the only out is K♥, and it flips every deal Arch wins
+    (king,) = encode_cards([(13, "Hearts")])
+    assert breakdown["river_outs"][1].sum() == breakdown["river_outs"][1, king]
+    assert breakdown["river_outs"][1, king] == outcomes["Arch"] > 0
+    assert breakdown["turn_outs"].sum() == 0  # the turn was known
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from src import bench
+from src.cli import main
+
+
+def test_every_variant_and_table_size_is_covered():
+    for variant in ("texas", "omaha"):
+        for players in range(2, 7):
+            assert f"game_{variant}_{players}p" in bench.BENCHMARKS
+            assert f"batch_{variant}_{players}p" in bench.BENCHMARKS
+
+
+def test_run_selected_benchmarks():
+    results = bench.run_benchmarks("*deal", scale=0.01, repeat=1)
+    assert set(results) == {"deck_deal", "intdeck_deal"}
+    assert all(result["rate"] > 0 for result in results.values())
+
+
+def test_compare_flags_regressions():
+    baseline = {
+        "results": {
+            "fast": {"rate": 100.0, "unit": "evals/s"},
+            "slow": {"rate": 100.0, "unit": "evals/s"},
+            "gone": {"rate": 100.0, "unit": "evals/s"},
+        }
+    }
+    results = {
+        "fast": {"rate": 95.0, "unit": "evals/s"},
+        "slow": {"rate": 80.0, "unit": "evals/s"},
+        "new": {"rate": 1.0, "unit": "evals/s"},
+    }
+    rows = {row[0]: row for row in bench.compare(results, baseline, tolerance=0.1)}
+    assert set(rows) == {"fast", "slow"}
+    assert not rows["fast"][4]
+    assert rows["slow"][4] and rows["slow"][3] == pytest.approx(0.8)
+
+
+def test_cli_saves_and_compares(tmp_path, capsys):
+    baseline = tmp_path / "bench.json"
+    main(
+        ["bench", "--only", "intdeck_deal", "--scale", "0.01", "--save", str(baseline)]
+    )
+    saved = json.loads(baseline.read_text())
+    assert set(saved["results"]) == {"intdeck_deal"}
+    assert saved["machine"]["python"]
+
+    # pretend the baseline was 1000x faster
+    saved["results"]["intdeck_deal"]["rate"] *= 1000
+    baseline.write_text(json.dumps(saved))
+    with pytest.raises(SystemExit) as exit_info:
+        main(
+            [
+                "bench",
+                "--only",
+                "intdeck_deal",
+                "--scale",
+                "0.01",
+                "--compare",
+                str(baseline),
+            ]
+        )
+    assert exit_info.value.code == 1
+    assert "REGRESSION" in capsys.readouterr().out
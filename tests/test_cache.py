@@ -0,0 +1,76 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from src.cache import EquityCache
+from src.equity import run_equity
+
+
+@pytest.fixture
+def base_state():
+    return {
+        "players": [
+            {"name": "Sam", "hand": [(14, "Hearts"), (13, "Hearts")]},
+            {"name": "Arch", "hand": [(2, "Hearts"), (7, "Hearts")]},
+        ],
+        "table": {"flop": None, "turn": None, "river": None},
+        "game_type": "texas",
+    }
+
+
+def test_hit_is_mapped_to_new_names(tmp_path, base_state):
+    cache = EquityCache(tmp_path / "equity.sqlite")
+    first = cache.run(run_equity, base_state, sims=2000, seed=1)
+
+    other = {
+        "players": [
+            {"name": "Ann", "hand": [(14, "Clubs"), (13, "Clubs")]},
+            {"name": "Bob", "hand": [(2, "Clubs"), (7, "Clubs")]},
+        ],
+        "table": base_state["table"],
+        "game_type": "texas",
+    }
+    # a fresh instance proves the hit comes from disk, not process memory
+    hit = EquityCache(tmp_path / "equity.sqlite").run(
+        run_equity, other, sims=2000, seed=1
+    )
+    assert hit["outcomes"] == {
+        "Ann": first["outcomes"]["Sam"],
+        "Bob": first["outcomes"]["Arch"],
+        "Tie": first["outcomes"]["Tie"],
+    }
+
+
+def test_lru_eviction(tmp_path, base_state):
+    cache = EquityCache(tmp_path / "equity.sqlite", max_entries=2)
+    for sims in (100, 200, 300):
+        cache.run(run_equity, base_state, sims=sims, seed=0)
+    assert len(cache) == 2
+    assert (
+        EquityCache(tmp_path / "equity.sqlite").get(
+            base_state, {"compute": "run_equity", "sims": 100, "seed": 0}
+        )
+        is None
+    )
+
+
+def test_concurrent_get_put(tmp_path, base_state):
+    """One instance shared by many threads, as simulator.py shares it"""
+    cache = EquityCache(tmp_path / "equity.sqlite", memory_entries=8)
+    result = run_equity(base_state, 100, seed=0)
+
+    def work(thread):
+        for i in range(200):
+            params = {"thread": thread, "i": i % 10}
+            cache.put(base_state, params, result)
+            assert cache.get(base_state, params)["outcomes"] == result["outcomes"]
+
+    # switch threads as often as possible so unlocked access would interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(work, range(8)))
+    finally:
+        sys.setswitchinterval(interval)
+    assert len(cache) == 80
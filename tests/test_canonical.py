@@ -0,0 +1,63 @@
+import pytest
+import random
+from src.canonical import canonical_key, canonicalize, invert, permute_suits
+
+
+@pytest.fixture
+def base_state():
+    return {
+        "players": [
+            {"name": "Sam", "hand": [(14, "Hearts"), (13, "Hearts")]},
+            {"name": "Arch", "hand": [(2, "Hearts"), (7, "Hearts")]},
+        ],
+        "table": {"flop": None, "turn": None, "river": None},
+        "game_type": "texas",
+    }
+
+
+def test_suit_permutations_share_a_key(base_state):
+    """AhKh vs 2h7h is the same spot as AsKs vs 2s7s (in any card order)"""
+    permuted = {
+        "players": [
+            {"name": "Sam", "hand": [(13, "Spades"), (14, "Spades")]},
+            {"name": "Arch", "hand": [(7, "Spades"), (2, "Spades")]},
+        ],
+        "table": {"flop": None, "turn": None, "river": None},
+        "game_type": "texas",
+    }
+    assert canonical_key(base_state) == canonical_key(permuted)
+
+    permuted["players"][1]["hand"] = [(7, "Spades"), (2, "Clubs")]
+    assert canonical_key(base_state) != canonical_key(permuted)
+
+
+def test_perm_maps_back(base_state):
+    """Applying the inverse permutation to the representative restores the spot"""
+    base_state["table"]["flop"] = [(9, "Clubs"), (3, "Hearts"), (12, "Spades")]
+    canonical, perm = canonicalize(base_state)
+    assert permute_suits(canonical, invert(perm)) == permute_suits(
+        base_state, [0, 1, 2, 3]
+    )
+    assert canonical["players"][0]["name"] == "Sam"
+
+
+@pytest.mark.parametrize("game_type, hand_size", [("texas", 2), ("omaha", 4)])
+def test_random_relabellings_are_collapsed(game_type, hand_size):
+    rng = random.Random(hand_size)
+    deck = [
+        (rank, suit)
+        for rank in range(2, 15)
+        for suit in ["Hearts", "Diamonds", "Clubs", "Spades"]
+    ]
+    for _ in range(200):
+        cards = rng.sample(deck, 2 * hand_size + 4)
+        state = {
+            "players": [
+                {"name": "Sam", "hand": cards[:hand_size]},
+                {"name": "Arch", "hand": cards[hand_size : 2 * hand_size]},
+            ],
+            "table": {"flop": cards[-4:-1], "turn": cards[-1:], "river": None},
+            "game_type": game_type,
+        }
+        perm = rng.sample(range(4), 4)
+        assert canonical_key(permute_suits(state, perm)) == canonical_key(state)
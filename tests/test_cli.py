@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from src.cli import main, run_batch
+
+
+def _spot(hero, villain, flop=None, **extra):
+    return {
+        "players": [
+            {"name": "Sam", "hand": hero},
+            {"name": "Arch", "hand": villain},
+        ],
+        "table": {"flop": flop, "turn": None, "river": None},
+        "game_type": "texas",
+        **extra,
+    }
+
+
+AA = [[14, "Spades"], [14, "Clubs"]]
+KK = [[13, "Spades"], [13, "Clubs"]]
+FLOP = [[2, "Hearts"], [7, "Diamonds"], [9, "Clubs"]]
+
+
+@pytest.fixture
+def spots(tmp_path):
+    path = tmp_path / "spots.jsonl"
+    records = [
+        _spot(AA, KK, FLOP, id="exact"),
+        _spot(AA, None, id="sampled"),
+        _spot(AA, AA, id="duplicate cards"),
+        _spot(AA, None, FLOP),
+    ]
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return path
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_jsonl_batch(tmp_path, spots):
+    out = tmp_path / "out.jsonl"
+    assert run_batch(spots, out, sims=2000, seed=1) == 4
+    rows = _lines(out)
+    assert [row["index"] for row in rows] == [0, 1, 2, 3]
+    assert rows[0]["id"] == "exact" and rows[0]["exact"] and rows[0]["sims"] == 990
+    assert rows[1]["sims"] == 2000
+    assert rows[2]["error"].startswith("ValueError")
+    assert "error" not in rows[3]
+
+
+def test_bad_records_become_error_lines(tmp_path):
+    path = tmp_path / "spots.jsonl"
+    ranged = _spot(AA, None)
+    ranged["players"][1]["range"] = "AK-"
+    records = [
+        ranged,
+        _spot(AA, [[15, "Spades"], [13, "Clubs"]]),
+        "just a string",
+        _spot(AA, KK, FLOP),
+    ]
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    out = tmp_path / "out.jsonl"
+    assert run_batch(path, out, sims=1000, seed=1) == 4
+    rows = _lines(out)
+    assert [row["index"] for row in rows] == [0, 1, 2, 3]
+    assert all("error" in row for row in rows[:3])
+    assert "win_prob" in rows[3]
+
+
+def test_workers_give_the_same_results(tmp_path, spots):
+    run_batch(spots, tmp_path / "one.jsonl", sims=2000, seed=1, chunk_size=1)
+    run_batch(spots, tmp_path / "two.jsonl", sims=2000, seed=1, workers=2, chunk_size=1)
+    assert _lines(tmp_path / "one.jsonl") == _lines(tmp_path / "two.jsonl")
+
+
+def test_resume_from_checkpoint(tmp_path, spots):
+    out = tmp_path / "out.jsonl"
+    run_batch(spots, out, sims=2000, seed=1, chunk_size=1)
+    complete = out.read_text()
+
+    # pretend the job died after two records, mid-way through a third line
+    first_two = "".join(complete.splitlines(keepends=True)[:2])
+    out.write_text(first_two + '{"index": 2, "trunc')
+    checkpoint = {"records": 2, "offset": len(first_two.encode())}
+    (tmp_path / "out.jsonl.ckpt").write_text(json.dumps(checkpoint))
+
+    assert run_batch(spots, out, sims=2000, seed=1, chunk_size=1) == 2
+    assert out.read_text() == complete
+    assert run_batch(spots, out, sims=2000, seed=1) == 0  # already finished
+
+
+def test_csv_input_through_main(tmp_path, capsys):
+    spots = tmp_path / "spots.csv"
+    spots.write_text(
+        "id,hands,flop,turn,river\n"
+        "a,AsAc;KsKc,2h7d9c,,\n"
+        "b,AsAc;;QhQd,,,\n"
+        "c,AsXx;KsKc,,,\n"
+    )
+    out = tmp_path / "out.jsonl"
+    main(["batch", str(spots), "-o", str(out), "--sims", "1000", "--workers", "1"])
+    rows = _lines(out)
+    assert rows[0]["win_prob"].keys() == {"Player1", "Player2", "Tie"}
+    assert rows[0]["exact"]
+    assert len(rows[1]["win_prob"]) == 4
+    assert "error" in rows[2]
+    assert "wrote 3 records" in capsys.readouterr().err
@@ -0,0 +1,189 @@
+import numpy as np
+import pytest
+from src.batch_eval import simulate_batch
+from src.equity import run_adaptive, run_equity, run_streets, stream_equity
+
+
+@pytest.fixture
+def base_state():
+    """Hero with A♥ K♥ against one random hand"""
+    return {
+        "players": [
+            {"name": "Sam", "hand": [(14, "Hearts"), (13, "Hearts")]},
+            {"name": "Arch", "hand": None},
+        ],
+        "table": {"flop": None, "turn": None, "river": None},
+        "game_type": "texas",
+    }
+
+
+def test_counts_add_up(base_state):
+    result = run_equity(base_state, 3001, workers=1, seed=1)
+    assert sum(result["outcomes"].values()) == 3001
+    assert sum(result["win_prob"].values()) == pytest.approx(1.0)
+
+
+def test_same_seed_same_result(base_state):
+    """Results are reproducible for a given seed and worker count"""
+    first = run_equity(base_state, 2000, workers=2, seed=42)
+    second = run_equity(base_state, 2000, workers=2, seed=42)
+    assert first["outcomes"] == second["outcomes"]
+    assert (
+        run_equity(base_state, 2000, workers=2, seed=43)["outcomes"]
+        != first["outcomes"]
+    )
+
+
+def test_unseeded_run_reports_its_seed(base_state):
+    first = run_equity(base_state, 500)
+    again = run_equity(base_state, 500, seed=first["seed"])
+    assert first["outcomes"] == again["outcomes"]
+
+
+def test_exact_turn_runouts(base_state):
+    """With hands and turn known only 44 rivers remain; Arch needs the last king"""
+    base_state["players"][0]["hand"] = [(14, "Spades"), (14, "Clubs")]
+    base_state["players"][1]["hand"] = [(13, "Spades"), (13, "Clubs")]
+    base_state["table"]["flop"] = [(14, "Hearts"), (13, "Diamonds"), (2, "Clubs")]
+    base_state["table"]["turn"] = [(7, "Spades")]
+
+    result = run_equity(base_state, 10_000)
+    assert result["exact"]
+    assert result["outcomes"] == {"Sam": 43, "Arch": 1, "Tie": 0}
+
+
+def test_exact_picked_only_when_cheaper(base_state):
+    base_state["players"][1]["hand"] = [(2, "Spades"), (2, "Clubs")]
+    base_state["table"]["flop"] = [(12, "Hearts"), (7, "Diamonds"), (3, "Clubs")]
+    assert run_equity(base_state, 10_000, seed=0)["sims"] == 990  # C(45, 2)
+    assert not run_equity(base_state, 500, seed=0)["exact"]
+    assert run_equity(base_state, 500, exact=True)["sims"] == 990
+
+
+def test_adaptive_stops_at_target(base_state):
+    """A lopsided spot reaches the target error quickly"""
+    base_state["players"][0]["hand"] = [(14, "Spades"), (14, "Clubs")]
+    base_state["players"][1]["hand"] = [(2, "Spades"), (7, "Clubs")]
+    result = run_adaptive(base_state, target_se=0.01, batch_size=1000, seed=3)
+    assert result["stopped"] == "target"
+    assert max(result["std_error"].values()) <= 0.01
+    low, high = result["ci"]["Sam"]
+    assert low <= result["win_prob"]["Sam"] <= high
+
+
+def test_adaptive_respects_max_sims(base_state):
+    result = run_adaptive(base_state, target_se=1e-6, max_sims=3000, batch_size=1000)
+    assert result["stopped"] == "max_sims"
+    assert result["sims"] == 3000
+
+
+def test_sims_below_one_rejected(base_state):
+    with pytest.raises(ValueError, match="sims must be at least 1"):
+        run_equity(base_state, 0)
+    with pytest.raises(ValueError, match="max_sims must be at least 1"):
+        next(stream_equity(base_state, max_sims=0))
+    with pytest.raises(ValueError, match="max_sims must be at least 1"):
+        run_adaptive(base_state, max_sims=-5)
+    with pytest.raises(ValueError, match="sims must be at least 1"):
+        run_streets(base_state, 0)
+
+
+def test_stream_yields_running_results(base_state):
+    results = list(
+        stream_equity(base_state, target_se=1e-6, max_sims=4000, batch_size=1000)
+    )
+    assert [r["sims"] for r in results] == [1000, 2000, 3000, 4000]
+    assert [r["stopped"] for r in results] == [None, None, None, "max_sims"]
+    # each yielded result is a snapshot, not a view of the running tally
+    assert sum(results[0]["outcomes"].values()) == 1000
+
+
+def test_stream_matches_run_adaptive(base_state):
+    *_, last = stream_equity(base_state, target_se=0.01, batch_size=1000, seed=5)
+    assert last == run_adaptive(base_state, target_se=0.01, batch_size=1000, seed=5)
+
+
+def test_stream_interval_throttles_updates(base_state):
+    results = list(
+        stream_equity(
+            base_state, target_se=1e-6, max_sims=5000, batch_size=500, interval=60
+        )
+    )
+    assert len(results) == 1
+    assert results[0]["stopped"] == "max_sims"
+
+
+def test_streets_from_one_pass(base_state):
+    result = run_streets(base_state, 4000, seed=7)
+    # the river is the showdown, and it matches an ordinary run
+    assert result["streets"]["river"]["ahead"] == result["win_prob"]
+    rng = np.random.default_rng(np.random.SeedSequence(7))
+    assert result["outcomes"] == simulate_batch(base_state, 4000, rng)
+    assert result["streets"]["river"]["holds_up"]["Sam"] == 1.0
+    for street in ("flop", "turn", "river"):
+        stats = result["streets"][street]
+        assert sum(stats["ahead"].values()) == pytest.approx(1.0)
+        assert sum(stats["hand_classes"]["Arch"].values()) == pytest.approx(1.0)
+    # no straight or flush can be made with only two board cards to come
+    flop_classes = result["streets"]["flop"]["hand_classes"]["Sam"]
+    assert (
+        flop_classes["High Card"]
+        > result["streets"]["river"]["hand_classes"]["Sam"]["High Card"]
+    )
+
+
+def test_streets_with_known_flop(base_state):
+    base_state["table"]["flop"] = [(14, "Spades"), (14, "Clubs"), (13, "Clubs")]
+    result = run_streets(base_state, 2000, seed=1)
+    flop = result["streets"]["flop"]
+    assert flop["hand_classes"]["Sam"]["Full House"] == 1.0
+
+
+def test_breakdown_merges_across_workers(base_state):
+    single = run_equity(base_state, 3000, seed=2, breakdown=True)["breakdown"]
+    sharded = run_equity(base_state, 3000, workers=2, seed=2, breakdown=True)
+    assert sharded["breakdown"]["class_counts"].sum() == single["class_counts"].sum()
+    assert sharded["breakdown"]["river_outs"].shape == (2, 52)
+
+
+def test_stratified_sampling(base_state):
+    """Every river card gets its share of deals, and the estimate stays
+    close to the exact equity"""
+    base_state["players"][1]["hand"] = [(12, "Spades"), (11, "Spades")]
+    base_state["table"]["flop"] = [(12, "Hearts"), (7, "Clubs"), (2, "Diamonds")]
+    exact = run_equity(base_state, 100, exact=True)["win_prob"]
+    result = run_equity(base_state, 9000, seed=3, exact=False, stratify=True)
+    assert result["variance"]["methods"] == ["stratified"]
+    assert sum(result["outcomes"].values()) == 9000
+    for name, p in exact.items():
+        assert abs(result["win_prob"][name] - p) <= 4 * result["std_error"][name]
+    assert result["variance"]["reduction"]["Sam"] > 1
+
+    sharded = run_equity(
+        base_state, 9000, workers=2, seed=3, exact=False, stratify=True
+    )
+    assert sharded["sims"] == 9000
+    with pytest.raises(ValueError, match="one per stratum"):
+        run_equity(base_state, 20, exact=False, stratify=True)
+
+    # the stratified river is still random, so its outs are counted
+    plain = run_equity(base_state, 9000, seed=3, exact=False, breakdown=True)
+    result = run_equity(
+        base_state, 9000, seed=3, exact=False, stratify=True, breakdown=True
+    )
+    outs = result["breakdown"]["river_outs"]
+    assert outs.sum() > 0
+    assert outs.sum() == pytest.approx(plain["breakdown"]["river_outs"].sum(), rel=0.1)
+
+
+def test_pooled_seats(base_state):
+    """Random opponents share one equity with a much smaller error"""
+    base_state["players"] += [{"name": f"Villain{i}", "hand": None} for i in range(3)]
+    result = run_equity(base_state, 4000, seed=4, pool_seats=True)
+    opponents = ["Arch", "Villain0", "Villain1", "Villain2"]
+    assert len({result["win_prob"][name] for name in opponents}) == 1
+    assert sum(result["win_prob"].values()) == pytest.approx(1)
+    assert result["variance"]["methods"] == ["pooled seats"]
+    assert result["variance"]["reduction"]["Arch"] > 3
+    assert result["variance"]["reduction"]["Sam"] == pytest.approx(1)
+    assert result["std_error"]["Arch"] < result["variance"]["plain_std_error"]["Arch"]
@@ -0,0 +1,178 @@
+import pytest
+import random
+from itertools import combinations
+from src.cards import encode_card, encode_cards, decode_card, parse_cards
+from src.classes import CARDS, Player
+from src.eval_funcs import (
+    Evaluation,
+    check_straight,
+    evaluate_hand,
+    hand_class,
+    hand_strength,
+    hand_state,
+    state_strength,
+    texas_board,
+    texas_strength,
+    HAND_STATES,
+    RANK_TABLE,
+    SEVEN_CARD_STRENGTHS,
+    SEVEN_CARD_TABLE,
+    SEVEN_CARD_WEIGHTS,
+    FULL_HOUSE,
+    STRAIGHT,
+    STRAIGHT_FLUSH,
+    TWO_PAIR,
+)
+
+
+def test_card_encoding_round_trip():
+    """Every (rank, suit) pair maps to a distinct int in 0..51 and back"""
+    codes = set()
+    for rank in range(2, 15):
+        for suit in ["Hearts", "Diamonds", "Clubs", "Spades"]:
+            code = encode_card(rank, suit)
+            assert decode_card(code) == (rank, suit)
+            codes.add(code)
+    assert codes == set(range(52))
+
+
+@pytest.mark.parametrize(
+    "cards, expected_class",
+    [
+        # trips plus a pair among 7 cards is a full house
+        (
+            [(9, "Hearts"), (9, "Clubs"), (9, "Spades"), (4, "Hearts")]
+            + [(4, "Clubs"), (13, "Diamonds"), (2, "Spades")],
+            FULL_HOUSE,
+        ),
+        # A-2-3-4-5 wheel
+        (
+            [(14, "Hearts"), (2, "Clubs"), (3, "Spades"), (4, "Hearts")]
+            + [(5, "Clubs"), (9, "Diamonds"), (11, "Spades")],
+            STRAIGHT,
+        ),
+        (
+            [(10, "Hearts"), (11, "Hearts"), (12, "Hearts"), (13, "Hearts")]
+            + [(14, "Hearts"), (2, "Diamonds"), (2, "Spades")],
+            STRAIGHT_FLUSH,
+        ),
+        # three pairs still only count as two pair
+        (
+            [(10, "Hearts"), (10, "Clubs"), (6, "Hearts"), (6, "Spades")]
+            + [(3, "Hearts"), (3, "Diamonds"), (12, "Spades")],
+            TWO_PAIR,
+        ),
+    ],
+)
+def test_hand_classes(cards, expected_class):
+    """Test the hand class of some 7-card hands"""
+    assert hand_class(hand_strength(encode_cards(cards))) == expected_class
+
+
+def test_strength_matches_best_five_card_subset():
+    """The 7-card strength equals the best of its 21 five-card subsets"""
+    rng = random.Random(7)
+    for _ in range(500):
+        cards = rng.sample(range(52), 7)
+        best = max(hand_strength(combo) for combo in combinations(cards, 5))
+        assert hand_strength(cards) == best
+
+
+def test_seven_card_table():
+    """Every 7-rank multiset has its own SEVEN_CARD_WEIGHTS sum, holding the
+    same strength as RANK_TABLE"""
+    seen = set()
+    for key, strength in RANK_TABLE.items():
+        counts = [key // 5**r % 5 for r in range(13)]
+        if sum(counts) == 7:
+            index = sum(n * w for n, w in zip(counts, SEVEN_CARD_WEIGHTS))
+            assert index not in seen
+            seen.add(index)
+            assert SEVEN_CARD_STRENGTHS[SEVEN_CARD_TABLE[index]] == strength
+    assert len(seen) == 49205
+
+
+def test_evaluate_hand_matches_hand_strength():
+    """The Card-object wrapper agrees with hand_strength, flushes included"""
+    rng = random.Random(3)
+    for size in (5, 6, 7, 7, 7):
+        for _ in range(200):
+            codes = rng.sample(range(52), size)
+            player = Player(None, "Sam")
+            player.cards = [CARDS[code] for code in codes[:2]]
+            evaluation = evaluate_hand(player, [CARDS[code] for code in codes[2:]])
+            assert evaluation == Evaluation.from_strength(hand_strength(codes))
+
+
+def test_shared_board_state_matches_full_evaluation():
+    """texas_strength on a texas_board gives hand_strength's answer,
+    including on flush-heavy boards and 3 or 4 card boards"""
+    rng = random.Random(11)
+    for _ in range(3000):
+        board_size = rng.choice([3, 4, 5])
+        suited = [rank * 4 + 2 for rank in rng.sample(range(13), 5)]
+        deck = rng.choice([list(range(52)), suited + rng.sample(range(52), 20)])
+        cards = list(dict.fromkeys(rng.sample(deck, len(deck))))[: 2 + board_size]
+        board_state = texas_board(cards[2:])
+        assert texas_strength(cards[:2], board_state) == hand_strength(cards)
+
+
+@pytest.mark.parametrize(
+    "board, locked",
+    [
+        ("ThJhQhKhAh", True),  # royal flush
+        ("7h7d7c7sAd", True),  # quads, best kicker
+        ("AhAdAcAsKd", True),
+        ("7h7d7c7sKd", False),  # an ace kicker plays
+        ("9hThJhQhKh", False),  # Ah makes a higher straight flush
+    ],
+)
+def test_locked_boards(board, locked):
+    """A board is only locked when no two hole cards change its strength"""
+    cards = encode_cards(parse_cards(board))
+    assert bool(texas_board(cards)[3]) == locked
+    live = [card for card in range(52) if card not in cards]
+    unchanged = all(
+        hand_strength(list(hole) + cards) == hand_strength(cards)
+        for hole in combinations(live, 2)
+    )
+    assert unchanged == locked
+
+
+def test_incremental_states():
+    """Adding the turn and river to a flop state gives the 7-card strength"""
+    rng = random.Random(5)
+    for _ in range(3000):
+        cards = rng.sample(range(52), 7)
+        flop = hand_state(cards[:5])
+        assert state_strength(flop) == hand_strength(cards[:5])
+        turn = flop + HAND_STATES[cards[5]]
+        assert state_strength(turn) == hand_strength(cards[:6])
+        assert state_strength(turn + HAND_STATES[cards[6]]) == hand_strength(cards)
+
+
+def test_kicker_decides():
+    """Same pair, better kicker wins; identical ranks tie"""
+    board = encode_cards([(8, "Hearts"), (8, "Clubs"), (2, "Spades"), (5, "Diamonds")])
+    board += encode_cards([(9, "Clubs")])
+    ace = hand_strength(board + encode_cards([(14, "Hearts"), (3, "Clubs")]))
+    king = hand_strength(board + encode_cards([(13, "Hearts"), (3, "Spades")]))
+    other_king = hand_strength(board + encode_cards([(13, "Spades"), (4, "Spades")]))
+    assert ace > king
+    assert king == other_king
+
+
+def test_evaluation_from_strength():
+    """The compatibility Evaluation keeps the primary/kicker layout"""
+    cards = [(3, "Hearts"), (3, "Clubs"), (3, "Spades"), (13, "Hearts")]
+    cards += [(13, "Clubs"), (7, "Diamonds"), (2, "Spades")]
+    evaluation = Evaluation.from_strength(hand_strength(encode_cards(cards)))
+    assert evaluation.eval == FULL_HOUSE
+    assert evaluation.primary_cards == [3, 13]
+    assert evaluation.kickers == []
+
+
+def test_check_straight():
+    assert check_straight([14, 2, 3, 4, 5, 9]) == 5
+    assert check_straight([10, 11, 12, 13, 14, 9]) == 14
+    assert check_straight([2, 3, 4, 6, 7]) is None
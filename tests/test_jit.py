@@ -0,0 +1,67 @@
+import random
+
+import numpy as np
+import pytest
+from src import jit
+from src.batch_eval import deal_batch, jit_winners, simulate_batch, tally
+from src.eval_funcs import hand_strength
+
+# Without numba the kernel runs as plain Python, so these check the same
+# code the compiled backend runs, just slowly: keep the deal counts small.
+
+HEADS_UP = {
+    "players": [
+        {"name": "Sam", "hand": [(14, "Hearts"), (13, "Hearts")]},
+        {"name": "Arch", "hand": None},
+    ],
+    "table": {
+        "flop": [(12, "Hearts"), (7, "Hearts"), (2, "Clubs")],
+        "turn": None,
+        "river": None,
+    },
+    "game_type": "texas",
+}
+SIX_RANDOM = {
+    "players": [{"name": f"P{i}", "hand": None} for i in range(6)],
+    "table": {"flop": None, "turn": None, "river": None},
+    "game_type": "texas",
+}
+OMAHA = {
+    "players": [
+        {
+            "name": "Sam",
+            "hand": [(14, "Spades"), (14, "Clubs"), (10, "Spades"), (9, "Clubs")],
+        },
+        {"name": "Arch", "hand": None},
+        {"name": "Jo", "hand": None},
+    ],
+    "table": {"flop": None, "turn": [(8, "Spades")], "river": None},
+    "game_type": "omaha",
+}
+
+
+@pytest.mark.parametrize("num_cards", [5, 6, 7])
+def test_kernel_strength_matches_evaluator(num_cards):
+    rng = random.Random(num_cards)
+    args = (jit._TOP, jit._STRAIGHT_HIGH, jit._FLUSH_TABLE)
+    for _ in range(2000):
+        cards = rng.sample(range(52), num_cards)
+        assert jit.strength(np.array(cards), *args) == hand_strength(cards)
+
+
+@pytest.mark.parametrize("state, n", [(HEADS_UP, 400), (SIX_RANDOM, 200), (OMAHA, 60)])
+def test_kernel_deals_and_winners_match_numpy(state, n):
+    """Same rng, same deals, same winners as deal_batch + tally"""
+    expected = tally(*deal_batch(state, n, np.random.default_rng(5)))
+    got = jit_winners(state, n, np.random.default_rng(5))
+    assert got.tolist() == expected.tolist()
+
+
+@pytest.mark.skipif(not jit.AVAILABLE, reason="numba is not installed")
+def test_simulate_batch_backends_agree(monkeypatch):
+    for state in (HEADS_UP, SIX_RANDOM, OMAHA):
+        monkeypatch.setattr(jit, "ENABLED", True)
+        compiled = simulate_batch(state, 20_000, np.random.default_rng(1))
+        monkeypatch.setattr(jit, "ENABLED", False)
+        vectorised = simulate_batch(state, 20_000, np.random.default_rng(1))
+        assert compiled == vectorised
@@ -1,6 +1,11 @@
 import pytest
+import random
+from itertools import combinations
 from src.classes import Game, Card
+from src.cards import encode_card, encode_cards
+from src.eval_funcs import hand_strength, omaha_board, omaha_strength
 from copy import deepcopy
+from src.equity import exact_equity
 
 
 @pytest.fixture
@@ -51,8 +56,8 @@ def base_state_omaha():
             ],
             "community_cards": {
                 "flop": [(2, "Hearts"), (3, "Hearts"), (10, "Hearts")],  # 2♥ 3♥ 10♥
-                "turn": [(9, "Clubs")],  # 9♣
-                "river": [(10, "Diamonds")],  # 10♦
+                "turn": [(2, "Clubs")],  # 2♣
+                "river": [(9, "Clubs")],  # 9♣
             },
             "expected_winner": "Arch",
             "winning_hand": "Full House",
@@ -60,24 +65,26 @@ def base_state_omaha():
         {
             "name": "Two Pair Limited by Must-Use-Two Rule",
             "player1_hand": [
-                (7, "Hearts"),
-                (7, "Diamonds"),  # 7♥ 7♦
-                (6, "Hearts"),
-                (6, "Diamonds"),  # 6♥ 6♦
+                (13, "Spades"),
+                (13, "Clubs"),  # K♠ K♣
+                (12, "Spades"),
+                (12, "Clubs"),  # Q♠ Q♣
             ],
             "player2_hand": [
-                (8, "Clubs"),
-                (8, "Spades"),  # 8♣ 8♠
-                (5, "Clubs"),
-                (5, "Spades"),  # 5♣ 5♠
+                (9, "Clubs"),
+                (7, "Clubs"),  # 9♣ 7♣
+                (6, "Diamonds"),
+                (3, "Hearts"),  # 6♦ 3♥
             ],
             "community_cards": {
-                "flop": [(7, "Clubs"), (8, "Hearts"), (9, "Hearts")],  # 7♣ 8♥ 9♥
-                "turn": [(10, "Diamonds")],  # 10♦
-                "river": [(11, "Clubs")],  # J♣
+                "flop": [(14, "Diamonds"), (7, "Hearts"), (4, "Clubs")],  # A♦ 7♥ 4♣
+                "turn": [(2, "Spades")],  # 2♠
+                "river": [(9, "Diamonds")],  # 9♦
             },
+            # Sam's kings and queens would need all four hole cards, so he
+            # only plays a pair of kings
             "expected_winner": "Arch",
-            "winning_hand": "Higher Two Pair",
+            "winning_hand": "Two Pair, Nines and Sevens",
         },
     ],
 )
@@ -160,3 +167,52 @@ def test_omaha_four_card_deal(base_state_omaha):
         assert (
             len(player.cards) == 4
         ), f"Player {player.name} should have exactly 4 cards in Omaha"
+
+
+def test_omaha_tables_match_brute_force():
+    """Shared board triples + pruning give the same strength as all 60 combos"""
+    rng = random.Random(11)
+    for _ in range(300):
+        cards = rng.sample(range(52), 9)
+        hole, board = cards[:4], cards[4:]
+        expected = max(
+            hand_strength(pair + triple)
+            for pair in combinations(hole, 2)
+            for triple in combinations(board, 3)
+        )
+        assert omaha_strength(hole, omaha_board(board)) == expected
+
+
+def test_omaha_board_flush_pruning():
+    """A board with at most two cards per suit has no monochrome triple"""
+    board = encode_cards(
+        [(2, "Hearts"), (3, "Hearts"), (9, "Clubs"), (11, "Spades"), (13, "Clubs")]
+    )
+    assert omaha_board(board)[1] == []
+    board[2] = encode_card(9, "Hearts")
+    assert omaha_board(board)[1] == [(0, 0b10000011)]  # 2, 3, 9 of hearts
+
+
+def test_omaha_runout_enumeration(base_state_omaha):
+    """Enumerating rivers from the turn matches exact_equity, including a
+    known river left in place"""
+    state = deepcopy(base_state_omaha)
+    state["table"] = {
+        "flop": [(2, "Clubs"), (7, "Diamonds"), (9, "Spades")],
+        "turn": [(10, "Hearts")],
+        "river": None,
+    }
+    game = Game(2, state_dict=state, verbose=False)
+    game.start()
+    game.flop()
+    game.turn()
+    outcomes = game.runout_outcomes()
+    assert sum(outcomes.values()) == 52 - 8 - 4
+    assert outcomes == exact_equity(state)["outcomes"]
+
+    state["table"]["turn"] = None
+    state["table"]["river"] = [(3, "Hearts")]
+    game = Game(2, state_dict=state, verbose=False)
+    game.start()
+    game.flop()
+    assert game.runout_outcomes() == exact_equity(state)["outcomes"]
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from src.preflop import (
+    HANDS,
+    HEADS_UP_SHAPE,
+    NUM_HANDS,
+    VS_RANDOM_SHAPE,
+    PreflopTable,
+    _heads_up_classes,
+    _store_heads_up,
+    hand_index,
+    load_table,
+    write_table,
+)
+from src.cards import encode_cards
+
+AK = [(14, "Hearts"), (13, "Hearts")]
+QQ = [(12, "Spades"), (12, "Clubs")]
+
+
+def _state(*hands):
+    return {
+        "players": [{"name": f"P{i}", "hand": hand} for i, hand in enumerate(hands, 1)],
+        "table": {"flop": None, "turn": None, "river": None},
+        "game_type": "texas",
+    }
+
+
+@pytest.fixture
+def table(tmp_path):
+    heads_up = np.zeros(HEADS_UP_SHAPE)
+    vs_random = np.zeros(VS_RANDOM_SHAPE)
+    ak, qq = hand_index(encode_cards(AK)), hand_index(encode_cards(QQ))
+    heads_up[ak, qq] = 0.46, 0.004
+    heads_up[qq, ak] = 0.536, 0.004
+    vs_random[ak, 0] = 0.67, 0.02
+    vs_random[ak, 4] = 0.31, 0.01
+    write_table(
+        tmp_path / "preflop.u16",
+        heads_up,
+        vs_random,
+        {"sims": None, "multiway_sims": 100_000},
+    )
+    return PreflopTable(tmp_path / "preflop.u16")
+
+
+def test_hand_index_round_trip():
+    assert [hand_index(hand) for hand in HANDS] == list(range(NUM_HANDS))
+    assert hand_index((51, 50)) == NUM_HANDS - 1
+
+
+def test_heads_up_lookup(table):
+    result = table.lookup(_state(AK, QQ))
+    assert result["exact"]
+    assert result["win_prob"]["P1"] == pytest.approx(0.46, abs=1e-4)
+    assert result["win_prob"]["P2"] == pytest.approx(0.536, abs=1e-4)
+    assert result["win_prob"]["Tie"] == pytest.approx(0.004, abs=1e-4)
+
+
+def test_vs_random_lookup(table):
+    result = table.lookup(_state(None, None, AK, None, None, None))
+    assert not result["exact"]
+    assert result["win_prob"]["P3"] == pytest.approx(0.31, abs=1e-4)
+    assert result["win_prob"]["P1"] == pytest.approx(0.68 / 5, abs=1e-4)
+    assert result["ci"]["P3"][0] < 0.31 < result["ci"]["P3"][1]
+
+
+def test_lookup_has_the_run_equity_shape(table):
+    result = table.lookup(_state(AK, QQ))
+    assert result.keys() >= {"outcomes", "win_prob", "std_error", "ci", "sims"}
+    assert result["seed"] is None and result["stopped"] == "preflop table"
+    assert sum(result["outcomes"].values()) == pytest.approx(result["sims"])
+
+
+def test_heads_up_classes_and_mirroring():
+    """AK vs QQ falls into 6 suit patterns: AKs sharing a suit with the
+    queens or not, and AKo with the queens in both, one or neither of
+    its suits"""
+    ak = [i for i, (low, high) in enumerate(HANDS) if (low >> 2, high >> 2) == (11, 12)]
+    qq = [i for i, (low, high) in enumerate(HANDS) if low >> 2 == high >> 2 == 10]
+    matchups = _heads_up_classes(sorted(ak + qq))
+    pairs = [pair for members in matchups.values() for pair in members]
+    assert len(pairs) == len(set(pairs))  # every matchup in exactly one class
+
+    ak_vs_qq = [
+        members
+        for members in matchups.values()
+        if {members[0][0] in qq, members[0][1] in qq} == {True, False}
+    ]
+    assert sorted(len(members) for members in ak_vs_qq) == [12, 12, 12, 12, 24, 24]
+
+    heads_up = np.zeros(HEADS_UP_SHAPE)
+    for members in ak_vs_qq:
+        _store_heads_up(heads_up, members, 0.4, 0.01)
+    for i in qq:
+        for j in ak:
+            assert tuple(heads_up[i, j]) == pytest.approx((0.4, 0.01))
+            assert tuple(heads_up[j, i]) == pytest.approx((0.59, 0.01))
+
+
+def test_uncovered_spots_fall_through(table):
+    flop = _state(AK, QQ)
+    flop["table"]["flop"] = [(2, "Clubs"), (7, "Diamonds"), (9, "Hearts")]
+    assert table.lookup(flop) is None
+    assert table.lookup(_state(AK, QQ, None)) is None
+    assert table.lookup({**_state(AK, QQ), "game_type": "omaha"}) is None
+    ranged = _state(AK, None)
+    ranged["players"][1]["range"] = "QQ+"
+    assert table.lookup(ranged) is None
+
+
+def test_missing_or_foreign_file(tmp_path):
+    assert load_table(tmp_path / "absent.u16") is None
+    (tmp_path / "junk.u16").write_bytes(b"\0" * 10)
+    with pytest.raises(ValueError):
+        PreflopTable(tmp_path / "junk.u16")
@@ -0,0 +1,64 @@
+import pytest
+import random
+
+import numpy as np
+from src import jit
+from src.batch_eval import simulate_batch
+from src.classes import Game, IntDeck, simulate_games
+from src.equity import run_equity
+from src.profiling import GAME_STAGES, StageStats, profile_games, run_cprofile
+
+STATE = {
+    "players": [
+        {"name": "Sam", "hand": [(14, "Hearts"), (13, "Hearts")]},
+        {"name": "Arch", "hand": None},
+    ],
+    "table": {"flop": None, "turn": None, "river": None},
+    "game_type": "texas",
+}
+
+
+def test_game_stages_are_timed_then_restored():
+    originals = {stage: Game.__dict__[stage] for stage in GAME_STAGES}
+    with profile_games() as stats:
+        outcomes = simulate_games(STATE, 200, IntDeck(random.Random(0)))
+    assert sum(outcomes.values()) == 200
+    assert stats.calls == dict.fromkeys(GAME_STAGES, 200)
+    assert all(row["seconds"] > 0 for row in stats.as_dict().values())
+    assert sum(row["share"] for row in stats.as_dict().values()) == pytest.approx(1)
+    assert {stage: Game.__dict__[stage] for stage in GAME_STAGES} == originals
+
+
+def test_sampling_every_nth_game():
+    with profile_games(every=10) as stats:
+        simulate_games(STATE, 200)
+    assert set(stats.calls.values()) == {20}
+
+
+def test_batch_stage_stats():
+    stats = StageStats()
+    simulate_batch(STATE, 5000, np.random.default_rng(0), batch_size=1000, stats=stats)
+    stages = ["jit"] if jit.ENABLED else ["deal", "showdown"]
+    assert stats.calls == dict.fromkeys(stages, 5)
+
+    sharded = StageStats()
+    run_equity(STATE, 4000, workers=2, seed=0, exact=False, stats=sharded)
+    assert sharded.calls == dict.fromkeys(stages, 2)
+    assert stages[-1] in sharded.report()
+
+
+def test_cprofile_mode(tmp_path):
+    text, outcomes = run_cprofile(
+        simulate_games, STATE, 50, path=tmp_path / "games.prof"
+    )
+    assert "compute_winner" in text
+    assert sum(outcomes.values()) == 50
+    assert (tmp_path / "games.prof").stat().st_size > 0
+
+
+def test_profile_command(capsys):
+    from src.cli import main
+
+    main(["profile", "--players", "3", "--sims", "100", "--every", "2"])
+    out = capsys.readouterr().out
+    assert "compute_winner" in out and "50" in out
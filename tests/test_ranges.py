@@ -0,0 +1,143 @@
+from math import comb
+
+import numpy as np
+import pytest
+from src.equity import exact_equity, run_adaptive, run_equity
+from src.preflop import (
+    HEADS_UP_SHAPE,
+    VS_RANDOM_SHAPE,
+    PreflopTable,
+    hand_index,
+    write_table,
+)
+from src.ranges import parse_range, range_equity, range_from_matrix, to_weights
+
+AK = [(14, "Hearts"), (13, "Hearts")]
+FLOP = [(2, "Clubs"), (7, "Diamonds"), (9, "Hearts")]
+
+
+def _state(villain, flop=FLOP):
+    return {
+        "players": [
+            {"name": "Hero", "hand": AK},
+            {"name": "Villain", "hand": None, "range": villain},
+        ],
+        "table": {"flop": flop, "turn": None, "river": None},
+        "game_type": "texas",
+    }
+
+
+@pytest.mark.parametrize(
+    "text, count",
+    [
+        ("AA", 6),
+        ("22+", 78),
+        ("55-99", 30),
+        ("AKs", 4),
+        ("AKo", 12),
+        ("AK", 16),
+        ("ATs+", 16),
+        ("A2s-A5s", 16),
+        ("AhKh", 1),
+        ("22+, ATs+, KQo", 106),
+    ],
+)
+def test_parse_range_counts(text, count):
+    assert len(parse_range(text)) == count
+
+
+def test_weights_and_overrides():
+    weights = parse_range("QQ+:0.5, AA")
+    assert weights[(48, 49)] == 1.0  # AA
+    assert weights[(40, 41)] == 0.5  # QQ
+    assert to_weights({"QQ+": 0.5, "AA": 1}) == weights
+
+    matrix = np.zeros((13, 13))
+    matrix[0, 1] = 1  # AKs
+    matrix[1, 0] = 0.25  # AKo
+    weights = range_from_matrix(matrix)
+    assert len(weights) == 16
+    assert sorted(set(weights.values())) == [0.25, 1.0]
+
+
+@pytest.mark.parametrize(
+    "text", ["AKx", "A1", "AhAh", "QQs", "A2s-K5s", "AK-", "A-K", "-", "AK-AQ-AJ"]
+)
+def test_bad_tokens(text):
+    with pytest.raises(ValueError):
+        parse_range(text)
+
+
+def test_single_combo_range_matches_exact_hand():
+    state = _state("QsQc")
+    fixed = {
+        **state,
+        "players": [
+            state["players"][0],
+            {"name": "Villain", "hand": [(12, "Spades"), (12, "Clubs")]},
+        ],
+    }
+    assert range_equity(state)["win_prob"] == exact_equity(fixed)["win_prob"]
+
+
+def test_random_hand_matches_exact_equity():
+    state = _state(None)
+    state["players"][1].pop("range")
+    state["table"]["turn"] = [(13, "Spades")]
+    result = range_equity(state)
+    assert result["exact"]
+    expected = exact_equity(state)["win_prob"]
+    for name, p in result["win_prob"].items():
+        assert p == pytest.approx(expected[name])
+
+
+def test_river_spot_is_enumerated():
+    state = _state(None)
+    state["players"][1].pop("range")
+    state["table"]["turn"] = [(13, "Spades")]
+    state["table"]["river"] = [(4, "Clubs")]
+    result = range_equity(state, exact=True)
+    assert result["sims"] == comb(45, 2)
+    assert result["win_prob"] == pytest.approx(exact_equity(state)["win_prob"])
+
+    state["players"][1]["range"] = "QQ+"
+    result = range_equity(state, exact=True)
+    # Hero's A♥ K♥ and the K♠ leave 6 QQ, 1 KK and 3 AA combos: only
+    # the queens lose to top pair
+    assert result["sims"] == 10
+    assert result["outcomes"] == {"Hero": 6, "Villain": 4, "Tie": 0}
+
+
+def test_sampling_agrees_with_enumeration():
+    state = _state("22+, ATs+, KQo")
+    exact = range_equity(state, exact=True)
+    sampled = range_equity(state, sims=100_000, seed=3, exact=False)
+    assert sampled["sims"] == 100_000
+    for name, p in exact["win_prob"].items():
+        assert abs(sampled["win_prob"][name] - p) < 4 * sampled["std_error"][name]
+
+
+def test_random_hand_entry_points_reject_ranges():
+    """A range must not be silently played as a random hand"""
+    with pytest.raises(ValueError, match="holds a range"):
+        run_equity(_state("QQ+"), 1000)
+    with pytest.raises(ValueError, match="holds a range"):
+        run_adaptive(_state("QQ+"))
+
+
+def test_dead_cards_empty_range():
+    with pytest.raises(ValueError):
+        range_equity(_state("AhKh"))
+
+
+def test_preflop_table_weighting(tmp_path):
+    heads_up = np.zeros(HEADS_UP_SHAPE)
+    heads_up[:, :, 0] = 0.5
+    # Hero's AhKh beats exactly one villain combo outright
+    heads_up[hand_index((48, 44)), hand_index((40, 41)), 0] = 1.0
+    write_table(tmp_path / "t.u16", heads_up, np.zeros(VS_RANDOM_SHAPE), {"sims": None})
+    result = range_equity(
+        _state("QQ", flop=None), table=PreflopTable(tmp_path / "t.u16")
+    )
+    assert result["exact"]
+    assert result["win_prob"]["Hero"] == pytest.approx((5 * 0.5 + 1) / 6, abs=1e-4)
@@ -0,0 +1,148 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from src.cache import EquityCache
+from src.service import EquityService, request_equity
+
+
+def _state(hero_name, villain_name, suit="Hearts"):
+    return {
+        "players": [
+            {"name": hero_name, "hand": [(14, suit), (13, suit)]},
+            {"name": villain_name, "hand": None},
+        ],
+        "table": {"flop": None, "turn": None, "river": None},
+        "game_type": "texas",
+    }
+
+
+PARAMS = {"target_se": 0.01, "max_sims": 20_000, "seed": 1}
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = EquityService(workers=1)
+    yield service
+    service.close()
+
+
+async def _serve(service, client):
+    """Run client(url) against the service on a free port."""
+    server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        return await client(f"http://127.0.0.1:{port}")
+
+
+async def _raw(url, request):
+    """Send raw request bytes; returns (status, JSON body) of the response."""
+    reader, writer = await asyncio.open_connection(*url[7:].split(":"))
+    writer.write(request)
+    writer.write_eof()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split()[1]), json.loads(body)
+
+
+def _post(body, length=None):
+    length = len(body) if length is None else length
+    return b"POST /equity HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (length, body)
+
+
+def test_identical_requests_are_coalesced(service, monkeypatch):
+    before = dict(service.stats)
+    compute = service._compute
+
+    async def gated(*args):
+        # hold the computation until every request has been registered, so
+        # however fast it runs the later ones find it in flight
+        while service.stats["requests"] - before["requests"] < 4:
+            await asyncio.sleep(0.01)
+        return await compute(*args)
+
+    monkeypatch.setattr(service, "_compute", gated)
+
+    async def client(url):
+        # the same spot, under different names and suits
+        requests = [
+            asyncio.to_thread(
+                request_equity, url, _state(f"P{i}", "Villain", suit), **PARAMS
+            )
+            for i, suit in enumerate(["Hearts", "Spades", "Clubs", "Hearts"])
+        ]
+        return await asyncio.gather(*requests)
+
+    results = asyncio.run(_serve(service, client))
+    assert service.stats["requests"] - before["requests"] == 4
+    assert service.stats["computed"] - before["computed"] == 1
+    assert service.stats["coalesced"] - before["coalesced"] == 3
+    probabilities = [result["win_prob"] for result in results]
+    assert [p[f"P{i}"] for i, p in enumerate(probabilities)] == [
+        probabilities[0]["P0"]
+    ] * 4
+    assert not service.in_flight
+
+
+def test_results_are_cached(tmp_path):
+    service = EquityService(workers=1, cache=EquityCache(tmp_path / "eq.sqlite"))
+    try:
+        first = asyncio.run(service.equity(_state("Sam", "Arch"), dict(PARAMS)))
+        again = asyncio.run(service.equity(_state("Ann", "Bob"), dict(PARAMS)))
+    finally:
+        service.close()
+    assert service.stats["computed"] == 1 and service.stats["cached"] == 1
+    assert again["win_prob"]["Ann"] == first["win_prob"]["Sam"]
+
+
+def test_bad_requests(service):
+    async def client(url):
+        bad_cards = _state("Sam", "Arch")
+        bad_cards["players"][1]["hand"] = bad_cards["players"][0]["hand"]
+        with pytest.raises(ValueError, match="more than once"):
+            await asyncio.to_thread(request_equity, url, bad_cards)
+        ranged = _state("Sam", "Arch")
+        ranged["players"][1]["range"] = "QQ+"
+        with pytest.raises(ValueError, match="holds a range"):
+            await asyncio.to_thread(request_equity, url, ranged)
+        with pytest.raises(ValueError, match="Unknown parameters"):
+            await asyncio.to_thread(request_equity, url, _state("a", "b"), sims=5)
+        bad_rank = _state("Sam", "Arch")
+        bad_rank["players"][0]["hand"] = [(15, "Hearts"), (13, "Hearts")]
+        with pytest.raises(ValueError, match="Invalid card"):
+            await asyncio.to_thread(request_equity, url, bad_rank)
+
+        assert (await _raw(url, _post(b"[1, 2]")))[0] == 400
+        assert (await _raw(url, _post(b'{"state": "texas"}')))[0] == 400
+        assert (await _raw(url, _post(b'{"state": {}}', length=100)))[0] == 400
+
+        reader, writer = await asyncio.open_connection(*url[7:].split(":"))
+        writer.write(b"GET /stats HTTP/1.1\r\n\r\n")
+        await writer.drain()
+        response = await reader.read()
+        return json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+    stats = asyncio.run(_serve(service, client))
+    assert stats["in_flight"] == 0
+
+
+def test_unexpected_errors_are_500(service, monkeypatch):
+    def broken(state_dict, **params):
+        raise IndexError("boom")
+
+    # a thread pool, so the worker can run a function defined here
+    monkeypatch.setattr(service, "pool", ThreadPoolExecutor(1))
+    monkeypatch.setattr("src.service.run_adaptive", broken)
+
+    async def client(url):
+        body = json.dumps({"state": _state("Sam", "Arch")}).encode()
+        return await _raw(url, _post(body))
+
+    try:
+        status, body = asyncio.run(_serve(service, client))
+    finally:
+        service.pool.shutdown()
+    assert status == 500 and body["error"] == "IndexError: boom"
+    assert not service.in_flight
@@ -1,7 +1,9 @@
 import pytest
 import random
-from src.classes import Game, Card, Player, Deck
+from src.classes import CARDS, Game, Card, Player, Deck, IntDeck
 from copy import deepcopy
+from src.cards import encode_card, encode_cards
+from src.equity import exact_equity
 
 random.seed(44)  # For reproducibility in tests
 
@@ -46,6 +48,78 @@ def test_twice_pop_card():
         deck.find_and_pop_card(14, "Hearts")  # Should raise error
 
 
+def test_int_deck_remove_draw_reset():
+    """Known cards come out in O(1), draws never repeat, reset restores all 52"""
+    deck = IntDeck(random.Random(1))
+    deck.remove(51)
+    with pytest.raises(ValueError):
+        deck.remove(51)  # Should raise error
+    dealt = deck.deal(51)
+    assert sorted(dealt) == list(range(51))
+    assert deck.draw() is None
+
+    deck.reset()
+    assert len(deck) == 52
+    card = deck.find_and_pop_card(14, "Hearts")
+    assert card.rank == 14 and card.suit == "Hearts"
+    assert len(deck.cards) == 51
+
+
+def test_games_share_a_deck(base_state):
+    """Reusing one IntDeck across games deals full, fresh hands every time"""
+    deck = IntDeck(random.Random(2))
+    state = deepcopy(base_state)
+    state["players"][1]["hand"] = None
+    for _ in range(50):
+        game = Game(2, state_dict=state, verbose=False, deck=deck)
+        game.start()
+        game.flop()
+        game.turn()
+        game.river()
+        game.compute_winner()
+        seen = game.players[0].cards + game.players[1].cards + game.open_cards
+        assert len({card.code for card in seen + game.burnt_cards}) == 12
+
+
+def test_known_board_cards_are_the_shared_cards(base_state):
+    """Known flop/turn/river cards, including ones taken back from a player
+    or the burn pile, are the shared CARDS objects rather than new copies"""
+    state = deepcopy(base_state)
+    state["players"][0]["hand"] = [(10, "Hearts"), (13, "Hearts")]
+    state["table"]["flop"] = [(10, "Hearts"), (11, "Hearts"), (12, "Hearts")]
+    state["table"]["turn"] = [(9, "Diamonds")]
+    game = Game(2, state_dict=state, verbose=False)
+    game.start()
+    game.flop()
+    game.turn()
+    game.river()
+    assert all(card is CARDS[card.code] for card in game.open_cards)
+    assert not hasattr(game, "__dict__")
+    assert not hasattr(game.players[0], "__dict__")
+
+
+def test_runout_enumeration(base_state):
+    """runout_outcomes counts every turn and river, or every river once the
+    turn is out, just like exact_equity"""
+    state = deepcopy(base_state)
+    state["players"][0]["hand"] = [(14, "Spades"), (14, "Clubs")]
+    state["players"][1]["hand"] = [(13, "Spades"), (13, "Clubs")]
+    state["table"]["flop"] = [(14, "Hearts"), (13, "Diamonds"), (2, "Clubs")]
+    game = Game(2, state_dict=state, verbose=False)
+    game.start()
+    with pytest.raises(ValueError, match="flop"):
+        game.runout_outcomes()
+    game.flop()
+    assert game.runout_outcomes() == exact_equity(state)["outcomes"]
+
+    state["table"]["turn"] = [(7, "Spades")]
+    game = Game(2, state_dict=state, verbose=False)
+    game.start()
+    game.flop()
+    game.turn()
+    assert game.runout_outcomes() == {"Sam": 43, "Arch": 1, "Tie": 0}
+
+
 def test_known_hands(game):
     """Test that known hands are dealt correctly"""
     game.start()
@@ -81,14 +155,41 @@ def test_card_conflict_resolution(base_state):
     state["table"]["flop"] = [(10, "Hearts"), (11, "Hearts"), (12, "Hearts")]
 
     game = Game(2, state_dict=state)
-    game.start()
-    original_cards = [card for card in game.players[0].show_hand()]
+    game.start()  # known cards are reserved before anything is dealt
+    hand = game.players[0].show_hand()
+    assert len(hand) == 2 and CARDS[encode_card(13, "Hearts")] in hand
+    assert CARDS[encode_card(10, "Hearts")] not in hand, "the flop keeps 10 of Hearts"
     game.flop()
+    assert game.players[0].show_hand() == hand
+    assert game.open_cards[0] is CARDS[encode_card(10, "Hearts")]
 
-    new_cards = game.players[0].show_hand()
-    assert (
-        new_cards != original_cards
-    ), "Hand should change when card conflicts with flop"
+
+def test_known_cards_are_never_dealt(base_state):
+    """A known turn and river can't turn up in random hands or burns"""
+    state = deepcopy(base_state)
+    state["players"][1]["hand"] = None
+    state["table"]["turn"] = [(2, "Clubs")]
+    state["table"]["river"] = [(2, "Spades")]
+    deck = IntDeck(random.Random(5))
+    for _ in range(300):
+        game = Game(2, state_dict=state, verbose=False, deck=deck)
+        game.start()
+        game.flop()
+        game.turn()
+        game.river()
+        assert [card.code for card in game.open_cards[3:]] == encode_cards(
+            [(2, "Clubs"), (2, "Spades")]
+        )
+        dealt = game.players[1].cards + game.burnt_cards + game.open_cards[:3]
+        assert not set(dealt) & set(game.open_cards[3:])
+
+
+def test_duplicate_known_cards_raise(base_state):
+    state = deepcopy(base_state)
+    state["table"]["turn"] = [(7, "Diamonds")]
+    state["table"]["river"] = [(7, "Diamonds")]
+    with pytest.raises(ValueError, match="more than once"):
+        Game(2, state_dict=state, verbose=False).start()
 
 
 def test_tie_scenario(base_state):
@@ -146,7 +247,7 @@ def test_flush_vs_straight(base_state):
             "community_cards": {
                 "flop": [(2, "Hearts"), (3, "Diamonds"), (4, "Clubs")],  # 2♥ 3♦ 4♣
                 "turn": [(5, "Diamonds")],  # 5♦
-                "river": [(14, "Hearts")],  # A♥
+                "river": [(13, "Spades")],  # K♠
             },
             "expected_winner": "Arch",
             "winning_hand": "Pair of Eights",
@@ -199,3 +300,20 @@ def test_poker_hand_rankings(base_state, scenario):
     assert (
         winner == scenario["expected_winner"]
     ), f"Failed {scenario['name']}: Expected {scenario['expected_winner']} to win with {scenario['winning_hand']}"
+
+
+def test_known_river_is_dealt(base_state):
+    """A known river is the river every time, like a known flop or turn"""
+    state = deepcopy(base_state)
+    state["table"]["flop"] = [(2, "Hearts"), (3, "Diamonds"), (4, "Clubs")]
+    state["table"]["turn"] = [(5, "Diamonds")]
+    state["table"]["river"] = [(14, "Clubs")]
+    for _ in range(20):
+        game = Game(2, state_dict=state, verbose=False)
+        game.start()
+        game.flop()
+        game.turn()
+        game.river()
+        assert game.open_cards[-1] is CARDS[encode_card(14, "Clubs")]
+        # the wheel on the board is the best hand for both players
+        assert game.compute_winner() == "Tie"